@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Hits on the SQLite cache whose recency is written back in one statement
+SQLITE_TOUCH_BATCH = 128
+
+
+class AnswerCache(ABC):
+    """
+    Bounded cache of chatbot replies keyed on the normalized question.
+
+    Entries are evicted least-recently-used once ``max_size`` is reached and
+    expire ``ttl`` seconds after they were stored. Subclasses provide the
+    storage; counters are kept per process.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple]:
+        """The cached value, or None on a miss or an expired entry."""
+
+    @abstractmethod
+    def set(self, key: str, value: Tuple):
+        """Store ``value``, evicting the least recently used entries beyond ``max_size``."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Entries currently stored."""
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class NullAnswerCache(AnswerCache):
+    """Cache that stores nothing, used when caching is turned off."""
+
+    backend = "none"
+
+    def get(self, key: str) -> Optional[Tuple]:
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Tuple):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryAnswerCache(AnswerCache):
+    """In-process LRU/TTL cache, private to one worker."""
+
+    backend = "memory"
+
+    def __init__(self, max_size: int, ttl: float):
+        super().__init__(max_size, ttl)
+        self._entries: "OrderedDict[str, Tuple[float, Tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Tuple):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteAnswerCache(AnswerCache):
+    """
+    LRU/TTL cache in a local SQLite file, shared by every uvicorn worker on
+    the host. Each thread keeps its own connection.
+
+    Lookups only read: the recency of hit entries is written back in one
+    statement with the next ``set`` (or once SQLITE_TOUCH_BATCH hits have
+    piled up), and an expired entry stays until its key is set again or it
+    is evicted. The entry count is kept in a one-row table by triggers, so
+    it stays right across processes without counting the table.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, max_size: int, ttl: float, path: str):
+        super().__init__(max_size, ttl)
+        self.path = path
+        self._local = threading.local()
+        # Keys hit since the last write, with when they were used
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        db = self._connection()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS answer_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " used_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_answer_cache_used_at ON answer_cache (used_at)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS answer_cache_size ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0),"
+            " entries INTEGER NOT NULL)"
+        )
+        db.execute("INSERT OR IGNORE INTO answer_cache_size (id, entries) SELECT 0, COUNT(*) FROM answer_cache")
+        db.execute(
+            "CREATE TRIGGER IF NOT EXISTS answer_cache_inserted AFTER INSERT ON answer_cache"
+            " BEGIN UPDATE answer_cache_size SET entries = entries + 1; END"
+        )
+        db.execute(
+            "CREATE TRIGGER IF NOT EXISTS answer_cache_deleted AFTER DELETE ON answer_cache"
+            " BEGIN UPDATE answer_cache_size SET entries = entries - 1; END"
+        )
+        db.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[Tuple]:
+        db = self._connection()
+        # Wall clock, since the expiry is shared between processes
+        now = time.time()
+        row = db.execute("SELECT value, expires_at FROM answer_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._touched_lock:
+            self._touched[key] = now
+            flush = len(self._touched) >= SQLITE_TOUCH_BATCH
+        if flush:
+            self._write_touched(db)
+            db.commit()
+        return tuple(json.loads(value))
+
+    def _write_touched(self, db: sqlite3.Connection):
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            db.executemany(
+                "UPDATE answer_cache SET used_at = ? WHERE key = ?",
+                [(used_at, key) for key, used_at in touched.items()],
+            )
+
+    def set(self, key: str, value: Tuple):
+        db = self._connection()
+        now = time.time()
+        self._write_touched(db)
+        db.execute(
+            "INSERT INTO answer_cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET"
+            " value = excluded.value, expires_at = excluded.expires_at, used_at = excluded.used_at",
+            (key, json.dumps(value), now + self.ttl, now),
+        )
+        overflow = self._size(db) - self.max_size
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM answer_cache WHERE key IN"
+                " (SELECT key FROM answer_cache ORDER BY used_at LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+        db.commit()
+
+    def clear(self):
+        db = self._connection()
+        with self._touched_lock:
+            self._touched.clear()
+        db.execute("DELETE FROM answer_cache")
+        db.commit()
+
+    def _size(self, db: sqlite3.Connection) -> int:
+        return db.execute("SELECT entries FROM answer_cache_size WHERE id = 0").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size(self._connection())
+
+
+def create_answer_cache(backend: str, max_size: int, ttl: float, path: str) -> AnswerCache:
+    """Build the cache selected in settings."""
+    if backend == "memory":
+        return MemoryAnswerCache(max_size, ttl)
+    if backend == "sqlite":
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        return SqliteAnswerCache(max_size, ttl, path)
+    if backend == "none":
+        return NullAnswerCache(max_size, ttl)
+    raise ValueError(f"Unknown answer_cache_backend {backend!r}; use memory, sqlite or none")
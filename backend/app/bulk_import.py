@@ -0,0 +1,240 @@
+import csv
+import io
+import json
+from concurrent.futures import Executor
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .passwords import hash_password
+
+# Rows checked and inserted per statement batch
+IMPORT_CHUNK_SIZE = 500
+
+# Columns accepted in an import file, besides those of schemas.UserCreate
+BARANGAY_NAME_FIELD = "barangay"
+
+
+class ImportRow:
+    """One input row on its way through the import, and its outcome."""
+
+    __slots__ = ("line", "data", "user", "barangay_name", "status", "detail", "hashed_password")
+
+    def __init__(self, line: int, data: dict):
+        self.line = line
+        self.data = data
+        self.user: Optional[schemas.UserCreate] = None
+        self.barangay_name: Optional[str] = None
+        self.status: Optional[str] = None
+        self.detail: Optional[str] = None
+        self.hashed_password: Optional[str] = None
+
+    def fail(self, status: str, detail: str):
+        self.status = status
+        self.detail = detail
+
+    @property
+    def pending(self) -> bool:
+        return self.status is None
+
+    def result(self) -> dict:
+        return {
+            "line": self.line,
+            "email": self.user.email if self.user else self.data.get("email"),
+            "status": self.status,
+            "detail": self.detail,
+        }
+
+
+class UserImport:
+    """
+    Imports users in chunks: validate, check uniqueness against the file
+    and the database with one IN query per column, resolve barangays by
+    name, hash passwords in parallel, then insert the chunk as one
+    executemany.
+
+    The database steps take a plain Session, so the CLI runs them directly
+    and the API runs them through AsyncSession.run_sync.
+
+    ``role`` and ``barangay_id`` pin every row (used for admins, who may
+    only import residents of their own barangay); ``create_barangays``
+    allows unknown barangay names to be created.
+    """
+
+    def __init__(self, role: Optional[str] = None, barangay_id: Optional[int] = None,
+                 create_barangays: bool = False, dry_run: bool = False):
+        self.role = role
+        self.barangay_id = barangay_id
+        self.create_barangays = create_barangays
+        self.dry_run = dry_run
+        self.seen_emails: Set[str] = set()
+        self.seen_usernames: Set[str] = set()
+        self.counts: Dict[str, int] = {}
+
+    def validate(self, rows: List[ImportRow]):
+        for row in rows:
+            if not row.pending:
+                continue
+            data = {key: value for key, value in row.data.items() if value not in ("", None)}
+            row.barangay_name = data.pop(BARANGAY_NAME_FIELD, None)
+            if self.role is not None:
+                data["role"] = self.role
+            if self.barangay_id is not None:
+                data["barangay_id"] = self.barangay_id
+                row.barangay_name = None
+            try:
+                row.user = schemas.UserCreate(**data)
+            except ValidationError as e:
+                row.fail("invalid", "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ))
+                continue
+            if row.user.role not in ("user", "admin", "superadmin"):
+                row.fail("invalid", f"role: unknown role {row.user.role!r}")
+                continue
+            email, username = row.user.email.lower(), row.user.username
+            if email in self.seen_emails:
+                row.fail("duplicate", "email appears earlier in the file")
+            elif username in self.seen_usernames:
+                row.fail("duplicate", "username appears earlier in the file")
+            self.seen_emails.add(email)
+            self.seen_usernames.add(username)
+
+    def check(self, db: Session, rows: List[ImportRow]):
+        """Set-based uniqueness and barangay checks for one chunk."""
+        pending = [row for row in rows if row.pending]
+        if not pending:
+            return
+        emails = {row.user.email for row in pending}
+        usernames = {row.user.username for row in pending}
+        taken_emails = {email.lower() for email in db.scalars(select(models.User.email).where(models.User.email.in_(emails)))}
+        taken_usernames = set(db.scalars(select(models.User.username).where(models.User.username.in_(usernames))))
+
+        names = {row.barangay_name for row in pending if row.barangay_name}
+        barangays = self._resolve_barangays(db, names) if names else {}
+        ids = {row.user.barangay_id for row in pending if row.user.barangay_id is not None}
+        known_ids = set(db.scalars(select(models.Barangay.id).where(models.Barangay.id.in_(ids)))) if ids else set()
+
+        for row in pending:
+            if row.user.email.lower() in taken_emails:
+                row.fail("exists", "Email already registered")
+            elif row.user.username in taken_usernames:
+                row.fail("exists", "Username already registered")
+            elif row.barangay_name:
+                barangay_id = barangays.get(row.barangay_name)
+                if barangay_id is None:
+                    row.fail("invalid", f"barangay: unknown barangay {row.barangay_name!r}")
+                else:
+                    row.user.barangay_id = barangay_id
+            elif row.user.barangay_id is not None and row.user.barangay_id not in known_ids:
+                row.fail("invalid", f"barangay_id: unknown barangay {row.user.barangay_id}")
+
+    def _resolve_barangays(self, db: Session, names: Set[str]) -> Dict[str, int]:
+        found = dict(db.execute(select(models.Barangay.name, models.Barangay.id).where(models.Barangay.name.in_(names))).all())
+        missing = names - set(found)
+        if missing and self.create_barangays and not self.dry_run:
+            db.execute(insert(models.Barangay), [{"name": name} for name in sorted(missing)])
+            found.update(db.execute(
+                select(models.Barangay.name, models.Barangay.id).where(models.Barangay.name.in_(missing))
+            ).all())
+        elif missing and self.create_barangays:
+            # Dry run: report the rows as importable without creating anything
+            found.update({name: 0 for name in missing})
+        return found
+
+    def hash_passwords(self, rows: List[ImportRow], executor: Executor, rounds: int):
+        pending = [row for row in rows if row.pending]
+        if self.dry_run:
+            return
+        for row, hashed in zip(pending, executor.map(hash_password, [row.user.password for row in pending], [rounds] * len(pending))):
+            row.hashed_password = hashed
+
+    def insert(self, db: Session, rows: List[ImportRow]):
+        """Insert the chunk's remaining rows in one executemany and commit."""
+        pending = [row for row in rows if row.pending]
+        if pending and not self.dry_run:
+            values = [{
+                "email": row.user.email,
+                "username": row.user.username,
+                "hashed_password": row.hashed_password,
+                "first_name": row.user.first_name or "",
+                "last_name": row.user.last_name or "",
+                "phone": row.user.phone,
+                "address": row.user.address,
+                "role": row.user.role or "user",
+                "barangay_id": row.user.barangay_id,
+                "is_active": True,
+            } for row in pending]
+            try:
+                db.execute(insert(models.User), values)
+                db.commit()
+            except IntegrityError as e:
+                # Someone else registered one of these in the meantime
+                db.rollback()
+                for row in pending:
+                    row.fail("error", f"chunk not imported: {e.orig}")
+                pending = []
+        else:
+            db.commit()
+        for row in pending:
+            row.status = "would_create" if self.dry_run else "created"
+
+    def tally(self, rows: List[ImportRow]) -> List[dict]:
+        results = [row.result() for row in rows]
+        for result in results:
+            self.counts[result["status"]] = self.counts.get(result["status"], 0) + 1
+        return results
+
+    def summary(self) -> dict:
+        return {"summary": dict(self.counts), "dry_run": self.dry_run}
+
+
+def read_rows(stream: io.TextIOBase, fmt: str) -> Iterator[ImportRow]:
+    """Rows of a CSV (with a header line) or JSON Lines file, numbered by input line."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for data in reader:
+            yield ImportRow(reader.line_num, {key.strip(): (value.strip() if isinstance(value, str) else value)
+                                             for key, value in data.items() if key})
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = ImportRow(line_number, {})
+                row.fail("invalid", f"not valid JSON: {e.msg}")
+                yield row
+                continue
+            if not isinstance(data, dict):
+                row = ImportRow(line_number, {})
+                row.fail("invalid", "each line must be a JSON object")
+                yield row
+                continue
+            yield ImportRow(line_number, data)
+    else:
+        raise ValueError(f"Unsupported import format {fmt!r}; use csv or jsonl")
+
+
+def chunked(rows: Iterable[ImportRow], size: int = IMPORT_CHUNK_SIZE) -> Iterator[List[ImportRow]]:
+    chunk: List[ImportRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt.lower()
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
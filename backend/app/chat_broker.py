@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Set
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is optional; the "redis" broker needs it
+    redis = None
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Put on a connection's queue to tell its WebSocket handler to close
+CLOSE = object()
+
+
+class ChatBroker(ABC):
+    """
+    Delivers new chat messages to the WebSocket connections of the users
+    they concern. Each connection gets a bounded queue; a connection that
+    falls ``max_queue`` messages behind is closed (the client reconnects and
+    catches up from the database) instead of holding messages for ever.
+
+    Delivery touches only the recipients' queues. Subclasses decide how a
+    published message reaches the worker holding the connection.
+    """
+
+    backend = "none"
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._queues: Dict[int, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        for queues in self._queues.values():
+            for queue in queues:
+                self._close(queue)
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.max_queue)
+        self._queues.setdefault(user_id, set()).add(queue)
+        return queue
+
+    async def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._queues.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[user_id]
+
+    @abstractmethod
+    async def publish(self, user_ids: Iterable[int], message: dict):
+        """Deliver ``message`` to the connections of ``user_ids``, wherever they are held."""
+
+    def _deliver(self, user_id: int, message: dict):
+        """Hand ``message`` to every connection of ``user_id`` in this worker."""
+        for queue in self._queues.get(user_id, ()):
+            try:
+                queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self._close(queue)
+
+    def _close(self, queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(CLOSE)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "users": len(self._queues),
+            "connections": sum(len(queues) for queues in self._queues.values()),
+            "max_queue": self.max_queue,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class MemoryChatBroker(ChatBroker):
+    """In-process broker: reaches connections held by this worker only."""
+
+    backend = "memory"
+
+    async def publish(self, user_ids: Iterable[int], message: dict):
+        self.published += 1
+        for user_id in set(user_ids):
+            self._deliver(user_id, message)
+
+
+class RedisChatBroker(ChatBroker):
+    """
+    Fans messages out across workers through Redis pub/sub, one channel per
+    user. A worker subscribes to a user's channel while it holds at least
+    one of their connections, so each message goes only to the workers that
+    have a recipient connected.
+
+    ``client`` may be any object with the redis.asyncio ``publish`` and
+    ``pubsub`` API (for tests, a local stand-in); otherwise one is created
+    from ``url``.
+    """
+
+    backend = "redis"
+
+    def __init__(self, max_queue: int, url: Optional[str] = None, client=None,
+                 channel_prefix: str = "chat:user:"):
+        super().__init__(max_queue)
+        if client is None and redis is None:
+            raise RuntimeError("The redis chat broker requires the redis package")
+        self.url = url
+        self.channel_prefix = channel_prefix
+        self._client = client
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _channel(self, user_id: int) -> str:
+        return f"{self.channel_prefix}{user_id}"
+
+    async def start(self):
+        if self._client is None:
+            self._client = redis.from_url(self.url or "redis://localhost:6379/0")
+        self._pubsub = self._client.pubsub()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        await super().stop()
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        first = user_id not in self._queues
+        queue = await super().subscribe(user_id)
+        if first:
+            await self._pubsub.subscribe(self._channel(user_id))
+        return queue
+
+    async def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        await super().unsubscribe(user_id, queue)
+        if user_id not in self._queues and self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._channel(user_id))
+
+    async def publish(self, user_ids: Iterable[int], message: dict):
+        self.published += 1
+        data = json.dumps(message)
+        for user_id in set(user_ids):
+            try:
+                await self._client.publish(self._channel(user_id), data)
+            except Exception as e:
+                # The message is saved either way; clients catch up on reconnect
+                logger.warning(f"Could not publish chat message to user {user_id}: {e}")
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Chat broker lost its Redis subscription: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                if not self._queues:
+                    # Nothing subscribed yet: get_message returns at once
+                    await asyncio.sleep(0.1)
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            self._deliver(int(channel[len(self.channel_prefix):]), json.loads(message["data"]))
+
+
+def create_chat_broker(backend: str, max_queue: int, url: Optional[str] = None) -> ChatBroker:
+    """Build the broker selected in settings."""
+    if backend == "memory":
+        return MemoryChatBroker(max_queue)
+    if backend == "redis":
+        return RedisChatBroker(max_queue, url)
+    raise ValueError(f"Unknown chat_broker_backend {backend!r}; use memory or redis")
+
+
+chat_broker = create_chat_broker(settings.chat_broker_backend, settings.chat_socket_queue, settings.chat_broker_url)
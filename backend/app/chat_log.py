@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from . import models
+from .core.config import settings
+from .db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLogWriter:
+    """
+    Write-behind log of chatbot exchanges (POST /chats/ai, /chats/ai/batch).
+
+    ``record`` only appends the question and answer rows to an in-memory
+    buffer, so the endpoint does not wait for the database. A background
+    thread writes the buffer as one multi-row insert whenever ``batch_size``
+    rows are waiting or ``interval`` seconds have passed, and drains it on
+    shutdown. At most ``max_pending`` rows are held; beyond that new
+    exchanges are dropped and counted rather than growing without bound.
+    """
+
+    def __init__(self, batch_size: int, interval: float, max_pending: int, session_factory=SessionLocal):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self._pending: Deque[dict] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def record(self, user_id: int, question: str, answer: str) -> bool:
+        """
+        Queue one exchange of ``user_id`` with the chatbot; False when the
+        buffer is full and it was dropped. The chatbot's side is NULL.
+        """
+        if self.max_pending <= 0:
+            return False
+        now = datetime.utcnow()
+        pair = {"user_low_id": user_id, "user_high_id": user_id, "is_bot": True, "created_at": now}
+        rows = (
+            {"sender_id": user_id, "receiver_id": None, "message": question, **pair},
+            {"sender_id": None, "receiver_id": user_id, "message": answer, **pair},
+        )
+        with self._condition:
+            if len(self._pending) + len(rows) > self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.extend(rows)
+            self.recorded += 1
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the writer thread after it has written everything still buffered."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self.flush_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.interval
+                while not self._stopping and len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                stopping = self._stopping
+                full = len(self._pending) >= self.batch_size
+            if stopping:
+                self.flush_all()
+                return
+            if not full:
+                # Interval is up: write what there is
+                self.flush()
+            while self.pending >= self.batch_size:
+                self.flush()
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _take(self) -> List[dict]:
+        with self._condition:
+            count = min(self.batch_size, len(self._pending))
+            return [self._pending.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """Write up to one batch now; returns the number of rows taken from the buffer."""
+        rows = self._take()
+        if rows:
+            self._write(rows)
+        return len(rows)
+
+    def flush_all(self):
+        while self.flush():
+            pass
+
+    def _write(self, rows: List[dict]):
+        db = self.session_factory()
+        try:
+            try:
+                db.execute(insert(models.Chat), rows)
+                db.commit()
+            except IntegrityError:
+                # A user deleted since asking: keep the rest of the batch
+                db.rollback()
+                user_ids = {row["user_low_id"] for row in rows}
+                known = set(db.scalars(select(models.User.id).where(models.User.id.in_(user_ids))))
+                valid = [row for row in rows if row["user_low_id"] in known]
+                self.failed += len(rows) - len(valid)
+                rows = valid
+                if rows:
+                    db.execute(insert(models.Chat), rows)
+                    db.commit()
+            self.written += len(rows)
+            self.batches += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            self.failed += len(rows)
+            logger.warning(f"Could not save {len(rows)} chatbot messages: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "interval": self.interval,
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+chat_log = ChatLogWriter(settings.chat_log_batch, settings.chat_log_interval, settings.chat_log_max_pending)
@@ -1,111 +1,417 @@
 import os
 import json
-from typing import Optional
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional, Tuple
 from difflib import SequenceMatcher
 
+from .answer_cache import create_answer_cache
+from .core.config import settings
+from .faq_artifact import FaqArtifact, normalize_faq_data
+from .faq_payload import PayloadCache
+from .faq_suggest import SuggestIndex
+from .faq_index import FaqIndex, FaqMatch, WORD_SCORE_WEIGHT
+from .faq_vectors import FaqVectorIndex, numpy_available
+
 # Load JSON data once at startup
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 JSON_FILE = os.path.join(os.path.dirname(BASE_DIR), "barangay_law_flutter.json")
-faq_data = None
+
+# Replies cached by normalized question; keys carry the FAQ version so a
+# reloaded FAQ never serves answers from the previous file
+answer_cache = create_answer_cache(
+    settings.answer_cache_backend,
+    settings.answer_cache_size,
+    settings.answer_cache_ttl,
+    settings.answer_cache_path,
+)
+
+DEFAULT_RESPONSE = "I'm here to help with Barangay Legal Aid questions. I couldn't find a specific answer to your question. Please try rephrasing your question, or contact the barangay office directly for assistance. You can also browse the categories to find relevant questions."
+ERROR_RESPONSE = "I apologize, but I encountered an error while processing your request. Please contact the barangay office directly for assistance."
+
+# How many replies each tier of the cascade produced since startup
+tier_counts = Counter()
+
+class ChatReply(NamedTuple):
+    message: str
+    tier: str
+    score: float
+
+class FaqSnapshot:
+    """
+    Everything built from one version of the FAQ file.
+
+    A snapshot is never modified once built. Reloading builds a new one off
+    to the side and swaps the module-level reference, so readers never block
+    and never see a half-built index.
+    """
+
+    def __init__(self, data: Optional[dict], index: FaqIndex, vectors: Optional[FaqVectorIndex],
+                 version: str, source: str, file_id: Tuple, build_seconds: float,
+                 artifact: Optional[FaqArtifact] = None):
+        self._data = data
+        self.index = index
+        self.suggest = SuggestIndex(index)
+        self.vectors = vectors
+        self.version = version
+        self.source = source
+        self.file_id = file_id
+        self.build_seconds = build_seconds
+        self.artifact = artifact
+        self.loaded_at = datetime.now(timezone.utc)
+        # Serialized GET /chats/faq bodies for this version
+        self.payloads = PayloadCache()
+
+    @property
+    def data(self) -> dict:
+        # Snapshots mapped from the compiled artifact only decode the full
+        # FAQ dict when something (GET /chats/faq) asks for it
+        if self._data is None:
+            self._data = self.artifact.to_faq_data()
+        return self._data
+
+    @property
+    def category_count(self) -> int:
+        if self.artifact is not None:
+            return len(self.artifact.category_names)
+        return len(self._data.get('categories', []))
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat(),
+            "build_seconds": round(self.build_seconds, 4),
+            "categories": self.category_count,
+            "questions": len(self.index),
+        }
+
+active_snapshot: Optional[FaqSnapshot] = None
+# Serializes builds; readers never take it once a snapshot exists
+_build_lock = threading.Lock()
+_reload_thread: Optional[threading.Thread] = None
+_reload_thread_lock = threading.Lock()
+_watcher_thread: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+def get_file_id(path: str) -> Tuple:
+    """mtime, inode and size; any change means the file was replaced or edited."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+def get_artifact_path() -> str:
+    return settings.faq_artifact_path or os.path.splitext(JSON_FILE)[0] + ".faq"
+
+def get_source_path() -> Optional[str]:
+    """The FAQ file, or the compiled artifact when only that was deployed; None if neither exists."""
+    if os.path.exists(JSON_FILE):
+        return JSON_FILE
+    artifact_path = get_artifact_path()
+    return artifact_path if os.path.exists(artifact_path) else None
+
+def build_snapshot(path: Optional[str] = None) -> FaqSnapshot:
+    """
+    Build a snapshot without touching the active one. The compiled artifact
+    (see build_faq_artifact.py) is memory-mapped when it was compiled from
+    the current JSON file; otherwise the JSON is parsed and indexed.
+    """
+    path = path or JSON_FILE
+    artifact_path = get_artifact_path()
+    start = time.perf_counter()
+    
+    if not os.path.exists(path) and os.path.exists(artifact_path):
+        # Deployed with only the compiled artifact
+        artifact = FaqArtifact(artifact_path)
+        return snapshot_from_artifact(artifact, get_file_id(artifact_path), start)
+    
+    file_id = get_file_id(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    source_sha1 = hashlib.sha1(raw).hexdigest()
+    
+    if os.path.exists(artifact_path):
+        try:
+            artifact = FaqArtifact(artifact_path)
+            if artifact.source_sha1 == source_sha1:
+                return snapshot_from_artifact(artifact, file_id, start)
+            print(f"FAQ artifact {artifact_path} is stale, loading {path} instead (rerun build_faq_artifact.py)")
+        except (OSError, ValueError) as e:
+            print(f"Could not use FAQ artifact {artifact_path}: {e}")
+    
+    data = normalize_faq_data(json.loads(raw.decode('utf-8')))
+    index = FaqIndex(data)
+    vectors = build_vector_index(index)
+    return FaqSnapshot(data, index, vectors, source_sha1[:12], path, file_id, time.perf_counter() - start)
+
+def snapshot_from_artifact(artifact: FaqArtifact, file_id: Tuple, start: float) -> FaqSnapshot:
+    index = FaqIndex.from_artifact(artifact)
+    vectors = build_vector_index(index)
+    return FaqSnapshot(None, index, vectors, artifact.source_sha1[:12], artifact.path, file_id,
+                       time.perf_counter() - start, artifact=artifact)
+
+def swap_snapshot(snapshot: FaqSnapshot):
+    """Make a fully built snapshot the active one."""
+    global active_snapshot
+    # No need to clear the answer cache: its keys carry the version, so
+    # replies for the previous file are never served and age out (and the
+    # sqlite cache is shared with the other workers)
+    active_snapshot = snapshot
+    print(f"FAQ data loaded successfully from {snapshot.source}")
+    print(f"Loaded {snapshot.category_count} categories, {len(snapshot.index)} questions indexed "
+          f"(version {snapshot.version}, {snapshot.build_seconds * 1000:.0f} ms)")
+
+def get_snapshot() -> Optional[FaqSnapshot]:
+    """Return the active FAQ snapshot, loading it on first use."""
+    snapshot = active_snapshot
+    if snapshot is not None:
+        return snapshot
+    
+    with _build_lock:
+        if active_snapshot is None:
+            try:
+                if get_source_path() is not None:
+                    swap_snapshot(build_snapshot())
+                else:
+                    print(f"Warning: neither {JSON_FILE} nor {get_artifact_path()} found")
+            except Exception as e:
+                print(f"Error loading FAQ data: {e}")
+        return active_snapshot
 
 def load_faq_data():
     """Load FAQ data from JSON file."""
-    global faq_data
-    if faq_data is not None:
-        return faq_data
-    
-    try:
-        if os.path.exists(JSON_FILE):
-            with open(JSON_FILE, 'r', encoding='utf-8') as f:
-                faq_data = json.load(f)
-            print(f"FAQ data loaded successfully from {JSON_FILE}")
-            print(f"Loaded {len(faq_data.get('categories', []))} categories")
-            return faq_data
-        else:
-            print(f"Warning: JSON file not found at {JSON_FILE}")
+    snapshot = get_snapshot()
+    return snapshot.data if snapshot is not None else None
+
+def reload_faq_data() -> Optional[FaqSnapshot]:
+    """
+    Build a new snapshot from the FAQ file and swap it in. Requests keep
+    using the previous snapshot until the swap; if the build fails the
+    previous snapshot stays active.
+    """
+    with _build_lock:
+        if get_source_path() is None:
+            print(f"Error reloading FAQ data: neither {JSON_FILE} nor {get_artifact_path()} found")
             return None
-    except Exception as e:
-        print(f"Error loading FAQ data: {e}")
-        return None
+        try:
+            snapshot = build_snapshot()
+        except Exception as e:
+            print(f"Error reloading FAQ data: {e}")
+            return None
+        swap_snapshot(snapshot)
+        return snapshot
+
+def reload_faq_data_in_background() -> bool:
+    """Start a reload on a background thread. Returns False if one is already running."""
+    global _reload_thread
+    with _reload_thread_lock:
+        if is_reloading():
+            return False
+        _reload_thread = threading.Thread(target=reload_faq_data, name="faq-reload", daemon=True)
+        _reload_thread.start()
+        return True
+
+def is_reloading() -> bool:
+    return _reload_thread is not None and _reload_thread.is_alive()
+
+def watch_faq_file(interval: float):
+    """Reload the FAQ whenever the file's mtime, inode or size changes."""
+    failed_file_id = None
+    while not _watcher_stop.wait(interval):
+        source = get_source_path()
+        if source is None:
+            continue
+        try:
+            file_id = get_file_id(source)
+        except OSError:
+            continue
+        snapshot = active_snapshot
+        if snapshot is not None and file_id in (snapshot.file_id, failed_file_id):
+            continue
+        # A failed build is only retried once the file changes again
+        failed_file_id = None if reload_faq_data() is not None else file_id
+
+def start_faq_watcher(interval: float):
+    global _watcher_thread
+    if interval <= 0 or (_watcher_thread is not None and _watcher_thread.is_alive()):
+        return
+    _watcher_stop.clear()
+    _watcher_thread = threading.Thread(target=watch_faq_file, args=(interval,), name="faq-watcher", daemon=True)
+    _watcher_thread.start()
+
+def stop_faq_watcher():
+    _watcher_stop.set()
+
+def normalize_query(user_input: str) -> str:
+    """Lowercase and collapse whitespace; used as the answer cache key."""
+    return " ".join(user_input.lower().split())
 
 def similarity_score(str1: str, str2: str) -> float:
     """Calculate similarity between two strings."""
     return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
 
-def find_best_match(user_input: str, threshold: float = 0.5) -> Optional[str]:
+def build_vector_index(index: FaqIndex) -> Optional[FaqVectorIndex]:
+    """Build the NumPy matrix when the vector backend is selected."""
+    if settings.chatbot_backend != "vector":
+        return None
+    if not numpy_available():
+        print("Warning: chatbot_backend is 'vector' but numpy is not installed, using the inverted index")
+        return None
+    return FaqVectorIndex(index)
+
+def rank_difflib(index: FaqIndex, user_input: str, top_k: int = 5, min_score: float = 0.0,
+                 categories: Optional[List[str]] = None) -> List[FaqMatch]:
     """
-    Search for the best matching question in the FAQ data.
-    Returns the answer if a match is found above the threshold.
+    Original full difflib scan over every question. Slow, but kept as the
+    reference the faster backends are checked against.
     """
-    data = load_faq_data()
-    if data is None:
-        return None
-    
     user_input_lower = user_input.lower().strip()
-    best_match = None
-    best_score = 0.0
+    positions = index.positions_in(categories) if categories else range(len(index))
+    scored = []
     
-    # Search through all categories and questions
-    for category in data.get('categories', []):
-        for question_obj in category.get('questions', []):
-            question = question_obj.get('question', '')
-            answer = question_obj.get('answer', '')
-            
-            question_lower = question.lower().strip()
-            
-            # Check for exact match first
-            if question_lower == user_input_lower:
-                return answer
-            
-            # Calculate similarity score
-            score = similarity_score(user_input, question)
-            
-            # Also check if user input contains keywords from the question
-            question_words = set(question_lower.split())
-            input_words = set(user_input_lower.split())
-            common_words = question_words.intersection(input_words)
-            if len(common_words) > 0:
-                # Boost score if there are common words
-                word_score = len(common_words) / max(len(question_words), len(input_words))
-                score = max(score, word_score * 0.8)
-            
-            if score > best_score:
-                best_score = score
-                best_match = answer
+    for position in positions:
+        question = index.questions[position]
+        question_lower = question.lower().strip()
+        
+        # Check for exact match first
+        if question_lower == user_input_lower:
+            return [index.match(position, 1.0)]
+        
+        # Calculate similarity score
+        score = similarity_score(user_input, question)
+        
+        # Also check if user input contains keywords from the question
+        question_words = set(question_lower.split())
+        input_words = set(user_input_lower.split())
+        common_words = question_words.intersection(input_words)
+        if len(common_words) > 0:
+            # Boost score if there are common words
+            word_score = len(common_words) / max(len(question_words), len(input_words))
+            score = max(score, word_score * WORD_SCORE_WEIGHT)
+        
+        if score > 0.0 and score >= min_score:
+            scored.append((-score, position))
     
-    # Return best match if above threshold
-    if best_score >= threshold and best_match:
-        return best_match
+    scored.sort()
+    return [index.match(position, -neg_score) for neg_score, position in scored[:top_k]]
+
+def get_faq_index() -> Optional[FaqIndex]:
+    """Return the FAQ index, building it on first use."""
+    snapshot = get_snapshot()
+    return snapshot.index if snapshot is not None else None
+
+def find_matches_batch(queries: List[str], top_k: int = 5, min_score: float = 0.0,
+                       snapshot: Optional[FaqSnapshot] = None,
+                       categories: Optional[List[str]] = None) -> List[List[FaqMatch]]:
+    """
+    Rank the FAQ questions against each query with the configured backend.
+    Returns, per query, up to top_k matches scoring at least min_score, best first.
+    With categories, only questions in those categories are considered.
+    """
+    snapshot = snapshot or get_snapshot()
+    if snapshot is None:
+        return [[] for _ in queries]
+    index = snapshot.index
     
+    backend = settings.chatbot_backend
+    if backend == "vector" and snapshot.vectors is not None:
+        return snapshot.vectors.rank_batch(queries, top_k=top_k, min_score=min_score, categories=categories)
+    if backend == "difflib":
+        return [rank_difflib(index, query, top_k=top_k, min_score=min_score, categories=categories) for query in queries]
+    return [index.rank(query, top_k=top_k, min_score=min_score, categories=categories) for query in queries]
+
+def find_matches(user_input: str, top_k: int = 5, min_score: float = 0.0,
+                 categories: Optional[List[str]] = None) -> List[FaqMatch]:
+    """
+    Rank the FAQ questions against the user input in a single pass.
+    Returns up to top_k matches scoring at least min_score, best first.
+    """
+    return find_matches_batch([user_input], top_k=top_k, min_score=min_score, categories=categories)[0]
+
+def find_best_match(user_input: str, threshold: float = 0.5) -> Optional[str]:
+    """
+    Search for the best matching question in the FAQ data.
+    Returns the answer if a match is found above the threshold.
+    """
+    matches = find_matches(user_input, top_k=1, min_score=threshold)
+    if matches and matches[0].answer:
+        return matches[0].answer
     return None
 
-def generate_chat_response(user_input: str) -> str:
+def get_match_tiers() -> List[Tuple[str, float]]:
+    """Threshold cascade from settings, strictest tier first."""
+    return sorted(settings.chatbot_thresholds.items(), key=lambda tier: tier[1], reverse=True)
+
+def apply_match_tiers(matches: List[FaqMatch]) -> ChatReply:
     """
-    Generates a response by searching the FAQ JSON file.
-    Falls back to a default response if no match is found.
+    Apply the threshold cascade to an already ranked match list.
+    The first tier whose threshold the best match reaches answers,
+    otherwise the default response is used.
+    """
+    best = matches[0] if matches and matches[0].answer else None
+    if best is not None:
+        for tier, threshold in get_match_tiers():
+            if best.score >= threshold:
+                return ChatReply(best.answer, tier, best.score)
+    return ChatReply(DEFAULT_RESPONSE, "default", best.score if best else 0.0)
+
+def generate_chat_replies(user_inputs: List[str]) -> List[ChatReply]:
+    """
+    Batch version of generate_chat_reply. Answers come from the answer cache
+    when possible; the remaining distinct questions go through the matcher
+    in a single call.
     """
     import logging
     logger = logging.getLogger(__name__)
     
     try:
-        logger.info(f"Searching FAQ for: {user_input}")
+        tiers = get_match_tiers()
+        min_score = tiers[-1][1] if tiers else 1.0
+        
+        # One snapshot for the whole batch, even if a reload swaps mid-way
+        snapshot = get_snapshot()
+        version = snapshot.version if snapshot is not None else None
+        queries = [normalize_query(user_input) for user_input in user_inputs]
+        answered = {}
+        for query in dict.fromkeys(queries):
+            cached = answer_cache.get(f"{version}:{query}")
+            if cached is not None:
+                answered[query] = ChatReply(*cached)
         
-        # Search for matching answer
-        answer = find_best_match(user_input, threshold=0.5)
+        missing = [query for query in dict.fromkeys(queries) if query not in answered]
+        for query, matches in zip(missing, find_matches_batch(missing, top_k=1, min_score=min_score, snapshot=snapshot)):
+            reply = apply_match_tiers(matches)
+            answer_cache.set(f"{version}:{query}", tuple(reply))
+            answered[query] = reply
         
-        if answer:
-            logger.info(f"Found matching answer in FAQ")
-            return answer
-        else:
-            logger.info(f"No matching answer found, using default response")
-            # Try a lower threshold for partial matches
-            answer = find_best_match(user_input, threshold=0.3)
-            if answer:
-                return answer
-            
-            # Default response if no match found
-            return "I'm here to help with Barangay Legal Aid questions. I couldn't find a specific answer to your question. Please try rephrasing your question, or contact the barangay office directly for assistance. You can also browse the categories to find relevant questions."
+        replies = [answered[query] for query in queries]
     
     except Exception as e:
         logger.error(f"Error in generate_chat_response: {str(e)}", exc_info=True)
-        return "I apologize, but I encountered an error while processing your request. Please contact the barangay office directly for assistance."
+        replies = [ChatReply(ERROR_RESPONSE, "error", 0.0) for _ in user_inputs]
+    
+    for reply in replies:
+        tier_counts[reply.tier] += 1
+    return replies
+
+def generate_chat_reply(user_input: str) -> ChatReply:
+    """
+    Generates a response by searching the FAQ JSON file once and applying
+    the threshold cascade. Falls back to a default response if no tier matches.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    
+    logger.info(f"Searching FAQ for: {user_input}")
+    reply = generate_chat_replies([user_input])[0]
+    logger.info(f"Answered from tier '{reply.tier}' (score {reply.score:.2f})")
+    return reply
+
+def generate_chat_response(user_input: str) -> str:
+    """
+    Generates a response by searching the FAQ JSON file.
+    Falls back to a default response if no match is found.
+    """
+    return generate_chat_reply(user_input).message
@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import case, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+def record_chats(db: Session, chats: Iterable[models.Chat]):
+    """
+    Fold newly inserted chats into the conversation rows of both their
+    participants: the last message moves forward and the receiver's unread
+    count goes up. One UPDATE per (user, peer) touched, plus an INSERT the
+    first time two users talk. Runs in the caller's transaction, so the
+    chats and their summaries commit together; the chats need ids (flush
+    first).
+
+    Takes a plain Session; async callers use ``AsyncSession.run_sync``.
+    """
+    latest: Dict[Tuple[int, int], models.Chat] = {}
+    unread: Dict[Tuple[int, int], int] = {}
+    for chat in chats:
+        for user_id, peer_id, incoming in (
+            (chat.sender_id, chat.receiver_id, False),
+            (chat.receiver_id, chat.sender_id, True),
+        ):
+            if incoming and user_id == peer_id:
+                continue
+            key = (user_id, peer_id)
+            if key not in latest or chat.id > latest[key].id:
+                latest[key] = chat
+            unread[key] = unread.get(key, 0) + incoming
+
+    # Same lock order in every transaction
+    for user_id, peer_id in sorted(latest):
+        chat, count = latest[(user_id, peer_id)], unread[(user_id, peer_id)]
+        if _advance(db, user_id, peer_id, chat, count):
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.Conversation).values(
+                    user_id=user_id,
+                    peer_id=peer_id,
+                    last_chat_id=chat.id,
+                    last_at=chat.created_at,
+                    unread_count=count,
+                ))
+        except IntegrityError:
+            # Another transaction inserted it first
+            _advance(db, user_id, peer_id, chat, count)
+
+
+def _advance(db: Session, user_id: int, peer_id: int, chat: models.Chat, unread: int) -> bool:
+    conversation = models.Conversation
+    # Chats committed out of order must not move the last message backwards
+    newer = or_(conversation.last_chat_id.is_(None), conversation.last_chat_id < chat.id)
+    result = db.execute(
+        update(conversation)
+        .where(conversation.user_id == user_id, conversation.peer_id == peer_id)
+        # MySQL assigns left to right, so last_at must be set while
+        # last_chat_id still holds the old value
+        .ordered_values(
+            (conversation.last_at, case((newer, chat.created_at), else_=conversation.last_at)),
+            (conversation.last_chat_id, case((newer, chat.id), else_=conversation.last_chat_id)),
+            (conversation.unread_count, conversation.unread_count + unread),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
@@ -2,7 +2,50 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str
+    # Async driver URL for the API; derived from database_url when unset
+    # (mysql+pymysql -> mysql+aiomysql, sqlite -> sqlite+aiosqlite)
+    async_database_url: str | None = None
+    # Connection pool, per engine and per worker (the API uses the async
+    # engine, scripts the sync one). Keep workers * (size + overflow) below
+    # the server's max_connections.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # Seconds to wait for a free connection before failing the request
+    db_pool_timeout: float = 30
+    # Replace connections older than this many seconds; keep it below the
+    # server's wait_timeout so idle connections are not dropped under us
+    db_pool_recycle: int = 1800
+    # True: test every connection on checkout (one extra round trip).
+    # False: rely on db_pool_recycle and discard connections when a query
+    # hits a disconnect.
+    db_pool_pre_ping: bool = True
     jwt_secret: str
+    # Seconds a worker trusts its cached token version of a user; a revoked
+    # token can keep working on other workers for up to this long
+    auth_version_cache_ttl: float = 30
+
+    # bcrypt cost factor for new hashes; older hashes are upgraded on login
+    password_hash_rounds: int = 12
+    # Threads hashing passwords, and how many hashes may wait for one before
+    # logins get 503
+    password_hash_workers: int = 2
+    password_hash_queue: int = 64
+    # Login attempts allowed per account within login_rate_window seconds
+    # (per worker); 0 disables the limit
+    login_rate_limit: int = 10
+    login_rate_window: float = 300
+    # Threads hashing passwords during a bulk user import (POST /users/import,
+    # import_users.py); separate from the login pool above
+    import_hash_workers: int = 4
+    # Seconds a worker serves a cached /stats/ result; writes in the same
+    # worker clear it at once, other workers' writes show up within this
+    stats_cache_ttl: float = 30
+    # Per-route request and SQL metrics on GET /metrics (Prometheus format)
+    metrics_enabled: bool = True
+    # Log statements slower than this many milliseconds, and requests that
+    # run the same statement this many times (likely N+1); 0 turns them off
+    slow_query_ms: float = 0
+    n_plus_one_threshold: int = 0
     port: int = 8000
     debug: bool = True
 
@@ -11,6 +54,44 @@ class Settings(BaseSettings):
     mysql_user: str | None = None
     mysql_password: str | None = None
 
+    # Chatbot threshold cascade: tier name -> minimum match score.
+    # Tiers are tried strictest first; below all of them the default reply is used.
+    chatbot_thresholds: dict[str, float] = {"primary": 0.5, "fallback": 0.3}
+    # FAQ scoring backend: "index" (inverted index), "vector" (NumPy matrix
+    # product, needs numpy) or "difflib" (original full scan, for reference)
+    chatbot_backend: str = "index"
+    # Largest number of questions accepted by POST /chats/ai/batch
+    chatbot_batch_limit: int = 500
+
+    # Chatbot answer cache: "memory" (per worker), "sqlite" (shared by the
+    # workers on one host, stored at answer_cache_path) or "none"
+    answer_cache_backend: str = "memory"
+    answer_cache_size: int = 2048
+    answer_cache_ttl: float = 3600
+    answer_cache_path: str = "answer_cache.sqlite3"
+
+    # Delivery of new chats to WebSocket clients (/chats/ws): "memory" (to
+    # connections on the same worker) or "redis" (across workers, needs the
+    # redis package; chat_broker_url defaults to redis://localhost:6379/0)
+    chat_broker_backend: str = "memory"
+    chat_broker_url: str | None = None
+    # Messages a connection may fall behind before it is closed
+    chat_socket_queue: int = 100
+
+    # Chatbot exchanges are saved as is_bot chats in the background: in
+    # batches of chat_log_batch rows, at least every chat_log_interval
+    # seconds, holding at most chat_log_max_pending rows (0 turns it off)
+    chat_log_batch: int = 200
+    chat_log_interval: float = 2.0
+    chat_log_max_pending: int = 10000
+
+    # Seconds between checks of the FAQ file for changes; 0 disables the watcher
+    faq_watch_interval: float = 5.0
+    # Compiled FAQ artifact; defaults to barangay_law_flutter.faq next to the JSON
+    faq_artifact_path: str | None = None
+    # Hard latency budget for GET /chats/suggest, in milliseconds
+    suggest_budget_ms: float = 1.0
+
     class Config:
         env_file = ".env"
 
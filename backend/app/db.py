@@ -1,10 +1,56 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .core.config import settings
+from .db_pool import instrument_pool, pool_options
+from .metrics import request_metrics
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+# Async driver used for each sync URL scheme
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mariadb": "mariadb+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def to_async_url(database_url: str) -> str:
+    """mysql+pymysql://... -> mysql+aiomysql://..., sqlite://... -> sqlite+aiosqlite://..."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.drivername in ASYNC_DRIVERS.values():
+        return database_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+# Sync engine for scripts (seed_users.py, check_users.py, ...) and migrations
+engine = create_engine(settings.database_url, **pool_options(settings.database_url, settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the API, so requests wait on the database without
+# holding a threadpool thread
+async_database_url = settings.async_database_url or to_async_url(settings.database_url)
+async_engine = create_async_engine(
+    async_database_url,
+    **pool_options(async_database_url, settings, asynchronous=True),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+pool_metrics = {
+    "async": instrument_pool(async_engine.pool, "async"),
+    "sync": instrument_pool(engine.pool, "sync"),
+}
+
+# Statement counts and SQL time per request, for GET /metrics
+request_metrics.instrument_engine(engine)
+request_metrics.instrument_engine(async_engine.sync_engine)
+
+def get_pool_stats() -> list:
+    """Per-pool counters, occupancy and checkout wait histograms."""
+    return [
+        pool_metrics["async"].snapshot(async_engine.pool),
+        pool_metrics["sync"].snapshot(engine.pool),
+    ]
+
 class Base(DeclarativeBase):
     pass
 
@@ -14,3 +60,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
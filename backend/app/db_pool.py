@@ -0,0 +1,154 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds, in milliseconds, of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """
+    Counters and a checkout wait-time histogram for one connection pool.
+
+    Wait time is measured around the pool's own checkout, so it covers
+    queueing for a free connection and opening a new one, but not pre-ping.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_counts: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def observe_wait(self, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_counts[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def attach(self, pool):
+        """Count checkouts, checkins, new connections and invalidations on ``pool``."""
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts += 1
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            self.checkins += 1
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            wait_counts = list(self.wait_counts)
+            waits = sum(wait_counts)
+            histogram: Dict[str, int] = {}
+            cumulative = 0
+            for bound, count in zip([str(b) for b in WAIT_BUCKETS_MS] + ["+Inf"], wait_counts):
+                cumulative += count
+                histogram[bound] = cumulative
+            stats = {
+                "pool": self.name,
+                "class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "count": waits,
+                    "mean": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+                    "max": round(self.wait_max_ms, 3),
+                    "buckets": histogram,
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return stats
+
+
+class TimedPoolMixin:
+    """Times every checkout of a queue pool into ``self.metrics``."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.observe_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.metrics.observe_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool (event listeners are carried
+        # over); keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(database_url: str, settings, asynchronous: bool = False) -> dict:
+    """
+    create_engine keyword arguments for the pool configured in settings.
+
+    SQLite keeps the dialect's default pool; its connections are local files
+    and the sizing knobs do not apply.
+    """
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return options
+    options.update({
+        "poolclass": TimedAsyncAdaptedQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+    })
+    return options
+
+
+def instrument_pool(pool, name: str) -> PoolMetrics:
+    """Attach a PoolMetrics to ``pool`` (timed pools also record checkout waits)."""
+    metrics = PoolMetrics(name)
+    pool.metrics = metrics
+    metrics.attach(pool)
+    return metrics
@@ -0,0 +1,293 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .faq_index import FaqIndex
+
+# Compiled FAQ layout (little-endian):
+#   header           magic, format version, SHA-1 of the source JSON, counts, average question length
+#   section table    (offset, length) of every section below, each aligned to 8 bytes
+#   string_offsets   u32[n_strings + 1] into string_data
+#   string_data      UTF-8 of questions, answers, category names, vocabulary
+#   question_category u32 per question
+#   doc_lengths      u32 token count per question
+#   token_idf        f64 per vocabulary token
+#   postings_offsets u32[n_tokens + 1] into postings_docs / postings_tfs
+#   postings_docs    u32 question positions, grouped by token id
+#   postings_tfs     u32 term frequencies, parallel to postings_docs
+#   exact_order      u32 question positions sorted by normalized question, for exact-match lookups
+MAGIC = b"BLAFAQ\x00\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sI20sIIIId")
+SECTIONS = (
+    "string_offsets",
+    "string_data",
+    "question_category",
+    "doc_lengths",
+    "token_idf",
+    "postings_offsets",
+    "postings_docs",
+    "postings_tfs",
+    "exact_order",
+)
+SECTION_ENTRY = struct.Struct("<QQ")
+ALIGNMENT = 8
+
+
+def normalize_faq_data(data) -> dict:
+    """
+    Accept either FAQ layout: barangay_law_flutter.json ({"categories": [...]})
+    or barangay_law_categorized.json ({category name: [questions]}).
+    """
+    if isinstance(data, dict) and "categories" in data:
+        return data
+    return {"categories": [{"name": name, "questions": questions} for name, questions in data.items()]}
+
+
+def compile_artifact(source_path: str, output_path: str) -> dict:
+    """Compile a FAQ JSON file into the binary artifact. Returns a short summary."""
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    data = normalize_faq_data(json.loads(raw.decode('utf-8')))
+    index = FaqIndex(data)
+
+    category_names = [category.get('name', '') for category in data.get('categories', [])]
+    question_category = array('I')
+    for category_id, category in enumerate(data.get('categories', [])):
+        question_category.extend([category_id] * len(category.get('questions', [])))
+    vocabulary = sorted(index.postings)
+
+    strings = list(index.questions) + list(index.answers) + category_names + vocabulary
+    encoded = [string.encode('utf-8') for string in strings]
+    string_offsets = array('I', [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    postings_offsets = array('I', [0])
+    postings_docs = array('I')
+    postings_tfs = array('I')
+    for token in vocabulary:
+        for position, tf in index.postings[token]:
+            postings_docs.append(position)
+            postings_tfs.append(tf)
+        postings_offsets.append(len(postings_docs))
+
+    exact_order = array('I', sorted(range(len(index)), key=lambda p: (index.lowered[p].strip(), p)))
+
+    sections = {
+        "string_offsets": string_offsets.tobytes(),
+        "string_data": b"".join(encoded),
+        "question_category": question_category.tobytes(),
+        "doc_lengths": array('I', index.doc_lengths).tobytes(),
+        "token_idf": array('d', [index.idf[token] for token in vocabulary]).tobytes(),
+        "postings_offsets": postings_offsets.tobytes(),
+        "postings_docs": postings_docs.tobytes(),
+        "postings_tfs": postings_tfs.tobytes(),
+        "exact_order": exact_order.tobytes(),
+    }
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, hashlib.sha1(raw).digest(),
+        len(index), len(category_names), len(vocabulary), len(strings), index.avg_doc_length,
+    )
+    offset = _align(len(header) + SECTION_ENTRY.size * len(SECTIONS))
+    table = []
+    for name in SECTIONS:
+        table.append((offset, len(sections[name])))
+        offset = _align(offset + len(sections[name]))
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for entry in table:
+            f.write(SECTION_ENTRY.pack(*entry))
+        for name, (section_offset, _) in zip(SECTIONS, table):
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(sections[name])
+    # Readers mapping the old file keep their pages; new readers see the new file
+    os.replace(tmp_path, output_path)
+
+    return {
+        "source": source_path,
+        "output": output_path,
+        "questions": len(index),
+        "categories": len(category_names),
+        "tokens": len(vocabulary),
+        "bytes": os.path.getsize(output_path),
+    }
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class StringTable(Sequence):
+    """Strings decoded on access from a slice of the artifact's string table."""
+
+    def __init__(self, artifact: "FaqArtifact", start: int, count: int):
+        self._artifact = artifact
+        self._start = start
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._artifact.string(self._start + i)
+
+
+class ArtifactPostings:
+    """``postings.get(token)`` backed by the artifact's token-id arrays."""
+
+    def __init__(self, artifact: "FaqArtifact"):
+        self._artifact = artifact
+
+    def get(self, token: str, default=None) -> Optional[List[Tuple[int, int]]]:
+        token_id = self._artifact.vocabulary.get(token)
+        if token_id is None:
+            return default
+        start, end = self._artifact.postings_offsets[token_id], self._artifact.postings_offsets[token_id + 1]
+        return list(zip(self._artifact.postings_docs[start:end], self._artifact.postings_tfs[start:end]))
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._artifact.vocabulary
+
+    def __len__(self) -> int:
+        return len(self._artifact.vocabulary)
+
+
+class ArtifactIdf:
+    """``idf[token]`` backed by the artifact's per-token weights."""
+
+    def __init__(self, artifact: "FaqArtifact"):
+        self._artifact = artifact
+
+    def __getitem__(self, token: str) -> float:
+        return self._artifact.token_idf[self._artifact.vocabulary[token]]
+
+
+class ArtifactExactLookup:
+    """``exact.get(normalized question)`` by binary search over the sorted positions."""
+
+    def __init__(self, artifact: "FaqArtifact"):
+        self._artifact = artifact
+        self._keys = _SortedKeys(artifact)
+
+    def get(self, key: str, default=None) -> Optional[int]:
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._artifact.exact_order[i]
+        return default
+
+
+class _SortedKeys(Sequence):
+    def __init__(self, artifact: "FaqArtifact"):
+        self._artifact = artifact
+
+    def __len__(self) -> int:
+        return len(self._artifact.exact_order)
+
+    def __getitem__(self, i: int) -> str:
+        return self._artifact.lowered[self._artifact.exact_order[i]].strip()
+
+
+class LoweredQuestions(Sequence):
+    """Lowercased questions, derived on access instead of stored twice."""
+
+    def __init__(self, questions: StringTable):
+        self._questions = questions
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __getitem__(self, i: int) -> str:
+        return self._questions[i].lower()
+
+
+class QuestionCategories(Sequence):
+    """Category name of each question, looked up through its category id."""
+
+    def __init__(self, artifact: "FaqArtifact"):
+        self._artifact = artifact
+
+    def __len__(self) -> int:
+        return len(self._artifact.question_category)
+
+    def __getitem__(self, i: int) -> str:
+        return self._artifact.category_names[self._artifact.question_category[i]]
+
+
+class FaqArtifact:
+    """
+    Memory-mapped compiled FAQ. Arrays are zero-copy views of the mapping and
+    strings are decoded on access, so workers on one host share the pages and
+    opening it costs little more than reading the vocabulary.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, source_sha1, questions, categories, tokens, strings, avg_doc_length = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled FAQ artifact")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has artifact format {version}, expected {FORMAT_VERSION}")
+        self.source_sha1 = source_sha1.hex()
+        self.avg_doc_length = avg_doc_length
+
+        sections: Dict[str, memoryview] = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(view, HEADER.size + i * SECTION_ENTRY.size)
+            sections[name] = view[offset:offset + length]
+
+        self._string_offsets = sections["string_offsets"].cast('I')
+        self._string_data = sections["string_data"]
+        self.question_category = sections["question_category"].cast('I')
+        self.doc_lengths = sections["doc_lengths"].cast('I')
+        self.token_idf = sections["token_idf"].cast('d')
+        self.postings_offsets = sections["postings_offsets"].cast('I')
+        self.postings_docs = sections["postings_docs"].cast('I')
+        self.postings_tfs = sections["postings_tfs"].cast('I')
+        self.exact_order = sections["exact_order"].cast('I')
+
+        self.questions = StringTable(self, 0, questions)
+        self.answers = StringTable(self, questions, questions)
+        self.lowered = LoweredQuestions(self.questions)
+        self.category_names = StringTable(self, 2 * questions, categories)
+        self.categories = QuestionCategories(self)
+        self.postings = ArtifactPostings(self)
+        self.idf = ArtifactIdf(self)
+        self.exact = ArtifactExactLookup(self)
+        tokens_start = 2 * questions + categories
+        self.vocabulary: Dict[str, int] = {self.string(tokens_start + i): i for i in range(tokens)}
+
+    def string(self, string_id: int) -> str:
+        start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+        return bytes(self._string_data[start:end]).decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def to_faq_data(self) -> dict:
+        """Rebuild the FAQ dict in the barangay_law_flutter.json layout."""
+        categories = [{"name": name, "questions": []} for name in self.category_names]
+        for position in range(len(self)):
+            categories[self.question_category[position]]["questions"].append({
+                "question": self.questions[position],
+                "answer": self.answers[position],
+            })
+        return {"categories": categories}
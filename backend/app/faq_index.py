@@ -0,0 +1,311 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Same weight the original matcher gives to the common-words score
+WORD_SCORE_WEIGHT = 0.8
+
+# A question counts towards a category facet when its BM25 weight is at
+# least this fraction of the best one for the query
+FACET_MIN_RELATIVE_BM25 = 0.5
+
+
+def lcs_length(query: str, char_masks: Dict[str, int], length: int) -> int:
+    """
+    Length of the longest common subsequence of ``query`` and a string of
+    ``length`` characters, given as the bitmask of each character's
+    positions in it (bit-parallel: a few integer operations per query char).
+    """
+    full = (1 << length) - 1
+    v = full
+    for ch in query:
+        u = v & char_masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return length - bin(v).count("1")
+
+
+class FaqMatch(NamedTuple):
+    position: int
+    score: float
+    question: str
+    answer: str
+    category: str
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lowercased text into word tokens, ignoring punctuation."""
+    return TOKEN_RE.findall(text.lower())
+
+
+class LazyWordSets:
+    """Whitespace word set of each lowercased question, computed once on first use."""
+
+    def __init__(self, lowered):
+        self._lowered = lowered
+        self._sets: List[Optional[frozenset]] = [None] * len(lowered)
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def __getitem__(self, position: int) -> frozenset:
+        words = self._sets[position]
+        if words is None:
+            words = self._sets[position] = frozenset(self._lowered[position].split())
+        return words
+
+
+class FaqIndex:
+    """
+    Inverted index over the FAQ questions, built once when the FAQ loads.
+
+    Every question is normalized and tokenized up front. Questions sharing a
+    token with the query are scored first, in BM25 order, so the best
+    answers are found early; the rest are then only checked against cheap
+    upper bounds of the difflib ratio (length, then longest common
+    subsequence), which rule out nearly all of them. Scores use the same
+    formula as the original matcher (difflib ratio, boosted by the
+    common-words score), so the answers rank the same as a full scan.
+    """
+
+    def __init__(self, data: dict):
+        self.questions: List[str] = []
+        self.answers: List[str] = []
+        self.categories: List[str] = []
+
+        for category in data.get('categories', []):
+            name = category.get('name', '')
+            for question_obj in category.get('questions', []):
+                self.questions.append(question_obj.get('question', ''))
+                self.answers.append(question_obj.get('answer', ''))
+                self.categories.append(name)
+
+        # Lowercased text (compared by difflib) and its whitespace words
+        # (compared by the common-words boost), exactly as the old matcher did
+        self.lowered: List[str] = [q.lower() for q in self.questions]
+        self.word_sets: List[frozenset] = [frozenset(q.split()) for q in self.lowered]
+
+        # Exact-match lookups are a dict hit; the first question wins
+        self.exact: Dict[str, int] = {}
+        for position, question in enumerate(self.lowered):
+            self.exact.setdefault(question.strip(), position)
+
+        # Inverted index: token -> [(position, term frequency)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for position, question in enumerate(self.lowered):
+            tokens = tokenize(question)
+            self.doc_lengths.append(len(tokens))
+            counts: Dict[str, int] = defaultdict(int)
+            for token in tokens:
+                counts[token] += 1
+            for token, tf in counts.items():
+                self.postings[token].append((position, tf))
+        self.postings = dict(self.postings)
+
+        total = len(self.questions)
+        self.avg_doc_length = (sum(self.doc_lengths) / total) if total else 0.0
+        self.idf: Dict[str, float] = {
+            token: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self.postings.items()
+        }
+
+        # SequenceMatcher caches its analysis of the second sequence, so each
+        # thread keeps one matcher per question and only swaps in the query
+        self._local = threading.local()
+
+    @classmethod
+    def from_artifact(cls, artifact) -> "FaqIndex":
+        """
+        Wrap a memory-mapped FaqArtifact instead of building from JSON. The
+        questions, postings and weights stay in the mapping; only the word
+        sets used by the common-words boost are computed, on first use.
+        """
+        index = cls.__new__(cls)
+        index.questions = artifact.questions
+        index.answers = artifact.answers
+        index.categories = artifact.categories
+        index.lowered = artifact.lowered
+        index.word_sets = LazyWordSets(artifact.lowered)
+        index.exact = artifact.exact
+        index.postings = artifact.postings
+        index.doc_lengths = artifact.doc_lengths
+        index.avg_doc_length = artifact.avg_doc_length
+        index.idf = artifact.idf
+        index._local = threading.local()
+        return index
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @property
+    def category_positions(self) -> Dict[str, List[int]]:
+        """Question positions of every category, built on first use."""
+        positions = getattr(self, '_category_positions', None)
+        if positions is None:
+            positions = defaultdict(list)
+            for position, category in enumerate(self.categories):
+                positions[category].append(position)
+            positions = self._category_positions = dict(positions)
+        return positions
+
+    def positions_in(self, categories: Iterable[str]) -> List[int]:
+        """Sorted question positions belonging to any of the categories."""
+        positions = set()
+        for category in categories:
+            positions.update(self.category_positions.get(category, ()))
+        return sorted(positions)
+
+    def facets(self, user_input: str) -> Dict[str, int]:
+        """Per category, how many questions match the query's tokens well."""
+        candidates = self.bm25_scores(tokenize(user_input))
+        if not candidates:
+            return {}
+        cutoff = max(candidates.values()) * FACET_MIN_RELATIVE_BM25
+        counts: Dict[str, int] = defaultdict(int)
+        for position, weight in candidates.items():
+            if weight >= cutoff:
+                counts[self.categories[position]] += 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    @property
+    def char_masks(self) -> List[Tuple[int, Dict[str, int]]]:
+        """
+        Per lowercased question, its length and the bitmask of each
+        character's positions (for lcs_length), built on first use.
+        """
+        masks = getattr(self, '_char_masks', None)
+        if masks is None:
+            masks = []
+            for position in range(len(self.questions)):
+                question = self.lowered[position]
+                question_masks: Dict[str, int] = {}
+                for i, ch in enumerate(question):
+                    question_masks[ch] = question_masks.get(ch, 0) | (1 << i)
+                masks.append((len(question), question_masks))
+            self._char_masks = masks
+        return masks
+
+    def _matcher(self, position: int) -> SequenceMatcher:
+        matchers = getattr(self._local, 'matchers', None)
+        if matchers is None:
+            matchers = self._local.matchers = {}
+        matcher = matchers.get(position)
+        if matcher is None:
+            matcher = SequenceMatcher(None)
+            matcher.set_seq2(self.lowered[position])
+            matchers[position] = matcher
+        return matcher
+
+    def bm25_scores(self, query_tokens: List[str]) -> Dict[int, float]:
+        """BM25 weight of every question sharing a token with the query."""
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(query_tokens):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = self.idf[token]
+            for position, tf in docs:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[position] / self.avg_doc_length)
+                scores[position] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def score(self, position: int, query_lower: str, query_words: frozenset, floor: float = 0.0) -> float:
+        """
+        Score one question the way the original matcher did.
+
+        The difflib ratio is skipped when an upper bound shows it cannot
+        reach ``floor``: the length ratio, then the longest common
+        subsequence, which difflib's matching blocks can never exceed.
+        """
+        score = 0.0
+        question_words = self.word_sets[position]
+        common = len(question_words & query_words)
+        if common:
+            score = common / max(len(question_words), len(query_words)) * WORD_SCORE_WEIGHT
+
+        bound = max(score, floor)
+        if bound > 0.0:
+            question_length, char_masks = self.char_masks[position]
+            total = len(query_lower) + question_length
+            if not total or 2.0 * min(len(query_lower), question_length) / total < bound:
+                return score
+            if 2.0 * lcs_length(query_lower, char_masks, question_length) / total < bound:
+                return score
+        matcher = self._matcher(position)
+        matcher.set_seq1(query_lower)
+        return max(score, matcher.ratio())
+
+    def match(self, position: int, score: float) -> FaqMatch:
+        return FaqMatch(position, score, self.questions[position], self.answers[position], self.categories[position])
+
+    def rank(self, user_input: str, top_k: int = 5, min_score: float = 0.0,
+             categories: Optional[Iterable[str]] = None) -> List[FaqMatch]:
+        """
+        Return up to ``top_k`` questions scoring at least ``min_score``, best
+        first, from a single pass over the index. With ``categories`` only
+        the questions in those categories are scored.
+        """
+        allowed = self.positions_in(categories) if categories else None
+        query_stripped = user_input.lower().strip()
+        position = self.exact.get(query_stripped)
+        if position is not None and (allowed is None or position in allowed):
+            return [self.match(position, 1.0)]
+
+        query_lower = user_input.lower()
+        query_words = frozenset(query_stripped.split())
+
+        # Min-heap of the current top-k as (score, -position); ties go to
+        # the earlier question, like the original in-order scan
+        top: List[Tuple[float, int]] = []
+
+        def floor() -> float:
+            if len(top) < top_k:
+                return min_score
+            return max(top[0][0], min_score)
+
+        def consider(position: int):
+            score = self.score(position, query_lower, query_words, floor())
+            if score <= 0.0 or score < min_score:
+                return
+            entry = (score, -position)
+            if len(top) < top_k:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+
+        if allowed is not None:
+            # Scoped queries cost only as much as the categories' size
+            for position in allowed:
+                consider(position)
+            return [self.match(-neg_position, score) for score, neg_position in sorted(top, reverse=True)]
+
+        candidates = self.bm25_scores(tokenize(query_lower))
+
+        # Strongest lexical candidates first so the bound prunes the rest
+        for position in sorted(candidates, key=lambda p: (-candidates[p], p)):
+            consider(position)
+
+        # The rest can still win on difflib similarity alone (typos,
+        # spelling variants); the bounds in score() rule most of them out
+        for position in range(len(self.questions)):
+            if position not in candidates:
+                consider(position)
+
+        return [self.match(-neg_position, score) for score, neg_position in sorted(top, reverse=True)]
+
+    def best_match(self, user_input: str, threshold: float = 0.5) -> Optional[FaqMatch]:
+        """Return the best question scoring at least ``threshold``, or None."""
+        matches = self.rank(user_input, top_k=1, min_score=threshold)
+        if matches and matches[0].answer:
+            return matches[0]
+        return None
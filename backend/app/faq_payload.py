@@ -0,0 +1,74 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+class FaqPayload:
+    """
+    One FAQ response body, serialized and compressed once.
+
+    ``etag`` changes whenever the FAQ version or the selection changes, so
+    clients can revalidate with If-None-Match and get a bodiless 304.
+    """
+
+    def __init__(self, content, etag: str):
+        self.etag = etag
+        self.body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.encoded: Dict[str, bytes] = {}
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            self.encoded["gzip"] = gzip.compress(self.body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(self.body, quality=11)
+
+    def negotiate(self, accept_encoding: Optional[str]):
+        """Pick the smallest body the client accepts. Returns (encoding or None, bytes)."""
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in (accept_encoding or "").split(",")
+            if part.strip() and not part.strip().endswith("q=0")
+        }
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and encoding in accepted:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an If-None-Match header already names this body."""
+        if not if_none_match:
+            return False
+        # If-None-Match uses weak comparison
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag.removeprefix("W/") in tags
+
+
+class PayloadCache:
+    """Small LRU of payloads for one FAQ version, keyed by selection."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._payloads: "OrderedDict[str, FaqPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: str, build) -> FaqPayload:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+        # Build outside the lock; a duplicate build for the same key is harmless
+        payload = build()
+        with self._lock:
+            self._payloads[key] = payload
+            while len(self._payloads) > self.max_size:
+                self._payloads.popitem(last=False)
+        return payload
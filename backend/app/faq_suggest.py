@@ -0,0 +1,88 @@
+import bisect
+import heapq
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Set
+
+from .faq_index import FaqIndex, tokenize
+
+
+class Suggestions(NamedTuple):
+    positions: List[int]
+    truncated: bool
+
+
+class SuggestIndex:
+    """
+    Sorted-prefix array over the normalized FAQ question tokens, for typeahead.
+
+    Every distinct token is kept in sorted order next to the questions that
+    contain it, so a prefix maps to one contiguous range found by binary
+    search. Finished words narrow the candidates to questions containing
+    them; the word still being typed is matched as a prefix.
+    """
+
+    def __init__(self, index: FaqIndex):
+        self.index = index
+        token_positions: Dict[str, Set[int]] = defaultdict(set)
+        for position, question in enumerate(index.questions):
+            for token in tokenize(question):
+                token_positions[token].add(position)
+
+        self.tokens: List[str] = sorted(token_positions)
+        self.positions: List[frozenset] = [frozenset(token_positions[token]) for token in self.tokens]
+        # Questions that start with the typed text rank first, then shorter questions
+        self.lowered_questions: List[str] = [" ".join(tokenize(question)) for question in index.questions]
+        self.order: List[int] = sorted(range(len(index)), key=lambda p: (len(self.lowered_questions[p]), p))
+        self.rank_of: List[int] = [0] * len(index)
+        for rank, position in enumerate(self.order):
+            self.rank_of[position] = rank
+
+    def _token_range(self, prefix: str) -> range:
+        start = bisect.bisect_left(self.tokens, prefix)
+        end = bisect.bisect_left(self.tokens, prefix + "\uffff", lo=start)
+        return range(start, end)
+
+    def suggest(self, text: str, limit: int = 8, budget_ms: float = 1.0) -> Suggestions:
+        """
+        Question positions completing ``text``, best first. Stops when the
+        latency budget runs out and reports the result as truncated.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        tokens = tokenize(text)
+        if not tokens:
+            return Suggestions([], False)
+
+        # A trailing space means the last word is finished too
+        if text[-1:].isspace():
+            complete, partial = tokens, None
+        else:
+            complete, partial = tokens[:-1], tokens[-1]
+
+        candidates = None
+        for token in complete:
+            i = bisect.bisect_left(self.tokens, token)
+            if i == len(self.tokens) or self.tokens[i] != token:
+                return Suggestions([], False)
+            candidates = self.positions[i] if candidates is None else candidates & self.positions[i]
+            if not candidates:
+                return Suggestions([], False)
+
+        truncated = False
+        if partial is not None:
+            matched: Set[int] = set()
+            for i in self._token_range(partial):
+                if time.perf_counter() > deadline:
+                    truncated = True
+                    break
+                positions = self.positions[i]
+                matched.update(positions if candidates is None else positions & candidates)
+            candidates = matched
+
+        typed = " ".join(tokens)
+        ranked = heapq.nsmallest(
+            limit,
+            candidates,
+            key=lambda p: (not self.lowered_questions[p].startswith(typed), self.rank_of[p]),
+        )
+        return Suggestions(ranked, truncated)
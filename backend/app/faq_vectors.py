@@ -0,0 +1,131 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the "vector" backend needs it
+    np = None
+
+from .faq_index import FaqIndex, FaqMatch, tokenize
+
+# Character n-gram size used next to the word tokens
+CHAR_NGRAM = 3
+
+# How many questions the matrix product shortlists for exact rescoring,
+# as a multiple of the requested top_k
+SHORTLIST_FACTOR = 8
+MIN_SHORTLIST = 32
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def extract_features(text: str) -> Dict[str, int]:
+    """Word tokens plus padded character n-grams of the lowercased text."""
+    features: Dict[str, int] = defaultdict(int)
+    lowered = text.lower().strip()
+    for token in tokenize(lowered):
+        features["w:" + token] += 1
+    padded = f" {' '.join(lowered.split())} "
+    for i in range(len(padded) - CHAR_NGRAM + 1):
+        features["c:" + padded[i:i + CHAR_NGRAM]] += 1
+    return features
+
+
+class FaqVectorIndex:
+    """
+    TF-IDF matrix over the FAQ questions for CPU-only vectorized scoring.
+
+    Every question is encoded at load time as an L2-normalized row of word and
+    character n-gram weights. A batch of queries is scored against all
+    questions with one matrix product and the best rows are picked with
+    ``argpartition``. That shortlist is rescored with the regular FaqIndex
+    formula, so scores stay on the same scale as the other backends and the
+    threshold cascade keeps its meaning.
+    """
+
+    def __init__(self, index: FaqIndex):
+        if np is None:
+            raise RuntimeError("The vector FAQ backend requires numpy")
+        self.index = index
+
+        rows = [extract_features(question) for question in index.questions]
+        document_frequency: Dict[str, int] = defaultdict(int)
+        for row in rows:
+            for feature in row:
+                document_frequency[feature] += 1
+
+        self.vocabulary: Dict[str, int] = {feature: column for column, feature in enumerate(sorted(document_frequency))}
+        total = len(rows)
+        self.idf = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for feature, column in self.vocabulary.items():
+            self.idf[column] = math.log((1 + total) / (1 + document_frequency[feature])) + 1
+
+        self.matrix = self._encode(rows)
+
+    def _encode(self, rows: List[Dict[str, int]]):
+        matrix = np.zeros((len(rows), len(self.vocabulary)), dtype=np.float32)
+        for row_number, row in enumerate(rows):
+            for feature, count in row.items():
+                column = self.vocabulary.get(feature)
+                if column is not None:
+                    matrix[row_number, column] = 1 + math.log(count)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def similarities(self, queries: List[str]):
+        """Cosine similarity of every query against every question."""
+        return self._encode([extract_features(query) for query in queries]) @ self.matrix.T
+
+    def rank_batch(self, queries: List[str], top_k: int = 5, min_score: float = 0.0,
+                   categories: Optional[Iterable[str]] = None) -> List[List[FaqMatch]]:
+        """Rank a batch of queries with one matrix product."""
+        if not queries:
+            return []
+        total = len(self.index)
+        shortlist = min(total, max(top_k * SHORTLIST_FACTOR, MIN_SHORTLIST))
+        similarities = self.similarities(queries)
+        allowed = None
+        if categories:
+            positions = self.index.positions_in(categories)
+            allowed = set(positions)
+            # Questions outside the requested categories can never be shortlisted
+            mask = np.full(total, -np.inf, dtype=np.float32)
+            mask[positions] = 0
+            similarities = similarities + mask
+            shortlist = min(shortlist, len(positions))
+
+        results = []
+        for query, row in zip(queries, similarities):
+            query_stripped = query.lower().strip()
+            position = self.index.exact.get(query_stripped)
+            if position is not None and (allowed is None or position in allowed):
+                results.append([self.index.match(position, 1.0)])
+                continue
+
+            if shortlist == 0:
+                results.append([])
+                continue
+            if shortlist < total:
+                candidates = np.argpartition(-row, shortlist - 1)[:shortlist]
+            else:
+                candidates = np.arange(total)
+
+            query_lower = query.lower()
+            query_words = frozenset(query_stripped.split())
+            scored = []
+            for position in candidates.tolist():
+                score = self.index.score(position, query_lower, query_words, min_score)
+                if score > 0.0 and score >= min_score:
+                    scored.append((-score, position))
+            scored.sort()
+            results.append([self.index.match(position, -neg_score) for neg_score, position in scored[:top_k]])
+        return results
+
+    def rank(self, user_input: str, top_k: int = 5, min_score: float = 0.0,
+             categories: Optional[Iterable[str]] = None) -> List[FaqMatch]:
+        return self.rank_batch([user_input], top_k=top_k, min_score=min_score, categories=categories)[0]
@@ -1,4 +1,5 @@
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,12 +14,26 @@ logger = logging.getLogger(__name__)
 # Reduce noise from multipart parser
 logging.getLogger('python_multipart').setLevel(logging.WARNING)
 
-from app.db import Base, engine
-from app.routers.auth import get_current_user
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from app.chat_broker import chat_broker
+from app.chat_log import chat_log
+from app.chatbot import get_snapshot, start_faq_watcher, stop_faq_watcher
+from app.core.config import settings
+from app.db import async_engine, get_pool_stats
+from app.principal import Principal
+from app.routers.auth import get_current_user, get_current_user_record
+from app.metrics import MetricsMiddleware, request_metrics
 from app.models import User
-from app.routers import auth, barangays, cases, chat, users, requests
+from app.pagination import NEXT_CURSOR_HEADER
+from app.passwords import password_hasher
+from app.routers import auth, barangays, cases, chat, users, requests, stats
 from app.schemas import UserRead
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
 app = FastAPI(title="Barangay Legal Aid API", version="0.1.0")
 
 load_dotenv()
@@ -29,28 +44,94 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Next-page cursor of the paginated list endpoints
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# Create database tables on startup (with error handling)
+# Outermost, so the timings include the other middleware
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
+# Schema changes go through Alembic (alembic upgrade head); only warn here
+# when the database is behind, so workers never race each other on DDL
 @app.on_event("startup")
-async def create_tables():
+async def check_migrations():
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created/verified successfully")
+        async with async_engine.connect() as conn:
+            current = await conn.run_sync(
+                lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+            )
+        head = ScriptDirectory.from_config(AlembicConfig(ALEMBIC_INI)).get_current_head()
+        if current != head:
+            logger.warning(f"Database schema is at {current}, latest migration is {head}; run 'alembic upgrade head'")
+        else:
+            logger.info(f"Database schema is up to date ({head})")
     except Exception as e:
-        logger.warning(f"Could not create database tables: {e}")
+        logger.warning(f"Could not check database migrations: {e}")
         logger.warning("Server will continue, but database operations may fail until connection is fixed")
 
+# Build the FAQ index before the first question and watch the file for changes
+@app.on_event("startup")
+async def load_faq():
+    get_snapshot()
+    start_faq_watcher(settings.faq_watch_interval)
+
+# Connect the broker that pushes new chats to /chats/ws clients
+@app.on_event("startup")
+async def start_chat_broker():
+    await chat_broker.start()
+
+@app.on_event("shutdown")
+async def stop_chat_broker():
+    await chat_broker.stop()
+
+# Save chatbot exchanges in the background; drained on shutdown
+@app.on_event("startup")
+async def start_chat_log():
+    chat_log.start()
+
+@app.on_event("shutdown")
+async def stop_chat_log():
+    chat_log.stop()
+
+@app.on_event("shutdown")
+async def stop_faq():
+    stop_faq_watcher()
+
+@app.on_event("shutdown")
+async def stop_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def close_database():
+    await async_engine.dispose()
+
 @app.get("/auth/me", response_model=UserRead)
-async def me(current: User = Depends(get_current_user)):
+async def me(current: User = Depends(get_current_user_record)):
     # Ensure is_active is a boolean, not None
     if current.is_active is None:
         current.is_active = True
     return current
 
+@app.get("/db/pool")
+async def db_pool_stats(current: Principal = Depends(get_current_user)):
+    """Connection pool occupancy and checkout wait times, per engine in this worker"""
+    if current.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view database pool stats"
+        )
+    return get_pool_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-route request counts, latency histograms, in-flight requests and SQL work, for Prometheus"""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(barangays.router)
 app.include_router(cases.router)
 app.include_router(chat.router)
 app.include_router(requests.router)
+app.include_router(stats.router)
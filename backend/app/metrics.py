@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Route label for requests that matched no route, so unknown paths cannot
+# create a new series each
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestTrace:
+    """SQL work done on behalf of one request; found through ``current_trace``."""
+
+    __slots__ = ("method", "scope", "statements", "sql_seconds", "statement_counts")
+
+    def __init__(self, method: str, scope: dict, count_statements: bool):
+        self.method = method
+        self.scope = scope
+        self.statements = 0
+        self.sql_seconds = 0.0
+        # Per SQL text, only kept when the N+1 detector is on
+        self.statement_counts: Optional[Counter] = Counter() if count_statements else None
+
+    @property
+    def route(self) -> str:
+        """Path template of the matched route, e.g. /cases/{case_id}; set by the router once it has matched."""
+        return getattr(self.scope.get("route"), "path", None) or UNMATCHED_ROUTE
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+class RouteStats:
+    """Counters and a latency histogram for one (method, route template)."""
+
+    __slots__ = ("requests", "latency_counts", "latency_sum", "sql_statements", "sql_seconds")
+
+    def __init__(self):
+        self.requests: Counter = Counter()  # by status code
+        self.latency_counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics for this worker, and the SQL event hooks
+    that attribute statements to the request running them.
+
+    ``slow_query_ms`` and ``n_plus_one_threshold`` turn on the detectors:
+    log any statement slower than the former, and any request that runs the
+    same SQL at least the latter number of times. 0 leaves them off.
+    """
+
+    def __init__(self, slow_query_ms: float = 0, n_plus_one_threshold: int = 0):
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        # Requests being handled; grouped by route when rendered, since the
+        # route is only known once the router has matched it
+        self._active: Set[RequestTrace] = set()
+        self._lock = threading.Lock()
+        # Statements run outside any request (scripts, background threads)
+        self.background_statements = 0
+        self.background_sql_seconds = 0.0
+
+    def _stats(self, method: str, route: str) -> RouteStats:
+        stats = self._routes.get((method, route))
+        if stats is None:
+            stats = self._routes.setdefault((method, route), RouteStats())
+        return stats
+
+    def start(self, trace: RequestTrace):
+        with self._lock:
+            self._active.add(trace)
+
+    def finish(self, trace: RequestTrace, status_code: int, seconds: float):
+        with self._lock:
+            self._active.discard(trace)
+            stats = self._stats(trace.method, trace.route)
+            stats.requests[status_code] += 1
+            stats.latency_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.latency_sum += seconds
+            stats.sql_statements += trace.statements
+            stats.sql_seconds += trace.sql_seconds
+        if trace.statement_counts:
+            statement, count = trace.statement_counts.most_common(1)[0]
+            if count >= self.n_plus_one_threshold:
+                logger.warning(
+                    f"Possible N+1 in {trace.method} {trace.route}: the same statement ran {count} times "
+                    f"({trace.statements} statements in total): {statement[:500]}"
+                )
+
+    def instrument_engine(self, engine):
+        """Time every statement ``engine`` runs and charge it to the current request."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            seconds = time.perf_counter() - conn.info["query_started_at"].pop()
+            trace = current_trace.get()
+            if trace is None:
+                with self._lock:
+                    self.background_statements += 1
+                    self.background_sql_seconds += seconds
+            else:
+                trace.statements += 1
+                trace.sql_seconds += seconds
+                if trace.statement_counts is not None:
+                    trace.statement_counts[statement] += 1
+            if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+                where = f"{trace.method} {trace.route}" if trace is not None else "background work"
+                logger.warning(f"Slow query ({seconds * 1000:.1f} ms) in {where}: {statement[:500]}")
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            in_flight: Counter = Counter({key: 0 for key, _ in routes})
+            for trace in self._active:
+                in_flight[(trace.method, trace.route)] += 1
+            lines = [
+                "# HELP http_requests_total Requests handled, by route template and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route), stats in routes:
+                for status_code, count in sorted(stats.requests.items()):
+                    lines.append(f'http_requests_total{{{_labels(method, route)},status="{status_code}"}} {count}')
+
+            lines += [
+                "# HELP http_requests_in_flight Requests being handled right now.",
+                "# TYPE http_requests_in_flight gauge",
+            ]
+            for (method, route), count in sorted(in_flight.items()):
+                lines.append(f"http_requests_in_flight{{{_labels(method, route)}}} {count}")
+
+            lines += [
+                "# HELP http_request_duration_seconds Time from request start to the end of the response.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), stats in routes:
+                labels = _labels(method, route)
+                cumulative = 0
+                for bound, count in zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], stats.latency_counts):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+            lines += [
+                "# HELP http_request_sql_statements_total SQL statements run while handling requests.",
+                "# TYPE http_request_sql_statements_total counter",
+            ]
+            for (method, route), stats in routes:
+                lines.append(f"http_request_sql_statements_total{{{_labels(method, route)}}} {stats.sql_statements}")
+
+            lines += [
+                "# HELP http_request_sql_seconds_total Time spent in SQL statements while handling requests.",
+                "# TYPE http_request_sql_seconds_total counter",
+            ]
+            for (method, route), stats in routes:
+                lines.append(f"http_request_sql_seconds_total{{{_labels(method, route)}}} {stats.sql_seconds:.6f}")
+
+            lines += [
+                "# HELP sql_background_statements_total SQL statements run outside any request.",
+                "# TYPE sql_background_statements_total counter",
+                f"sql_background_statements_total {self.background_statements}",
+                "# HELP sql_background_seconds_total Time spent in SQL statements outside any request.",
+                "# TYPE sql_background_seconds_total counter",
+                f"sql_background_seconds_total {self.background_sql_seconds:.6f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request and recording it under its
+    route template (not the raw path, so ids do not create new series).
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope, self.metrics.n_plus_one_threshold > 0)
+        token = current_trace.set(trace)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.start(trace)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.finish(trace, status_code, time.perf_counter() - started_at)
+            current_trace.reset(token)
+
+
+request_metrics = RequestMetrics(settings.slow_query_ms, settings.n_plus_one_threshold)
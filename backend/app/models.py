@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .db import Base
@@ -27,6 +27,8 @@ class User(Base):
     role = Column(String(20), default="user")
     barangay_id = Column(Integer, ForeignKey("barangays.id"), nullable=True)
     is_active = Column(Boolean, default=True)
+    # Bumped to revoke every token issued so far (password/role/barangay changes)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     barangay = relationship("Barangay", back_populates="users")
@@ -37,6 +39,13 @@ class User(Base):
     )
     requests = relationship("Request", back_populates="requester", cascade="all, delete-orphan")
 
+    # Role-scoped list queries filter on barangay and page on (created_at, id);
+    # InnoDB appends the primary key to every secondary index
+    __table_args__ = (
+        Index("ix_users_barangay_created", "barangay_id", "created_at"),
+        Index("ix_users_created", "created_at"),
+    )
+
 class Case(Base):
     __tablename__ = "cases"
 
@@ -48,12 +57,30 @@ class Case(Base):
 
     reporter = relationship("User", back_populates="cases")
 
+    __table_args__ = (
+        Index("ix_cases_reporter_created", "reporter_id", "created_at"),
+        Index("ix_cases_created", "created_at"),
+    )
+
+def _pair_low(context):
+    params = context.get_current_parameters()
+    return min(params["sender_id"], params["receiver_id"])
+
+def _pair_high(context):
+    params = context.get_current_parameters()
+    return max(params["sender_id"], params["receiver_id"])
+
 class Chat(Base):
     __tablename__ = "chats"
 
     id = Column(Integer, primary_key=True, index=True)
-    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # NULL on chatbot exchanges (is_bot): the chatbot's side of the exchange
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    # The participants in a fixed order, so both directions of a
+    # conversation share one index range; filled in on insert
+    user_low_id = Column(Integer, nullable=False, default=_pair_low)
+    user_high_id = Column(Integer, nullable=False, default=_pair_high)
     message = Column(Text, nullable=False)
     is_bot = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -61,6 +88,29 @@ class Chat(Base):
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
 
+    __table_args__ = (
+        Index("ix_chats_sender_created", "sender_id", "created_at"),
+        Index("ix_chats_receiver_created", "receiver_id", "created_at"),
+        Index("ix_chats_created", "created_at"),
+        Index("ix_chats_pair_created", "user_low_id", "user_high_id", "created_at"),
+    )
+
+class Conversation(Base):
+    """One user's view of their conversation with a peer, updated as chats are saved"""
+    __tablename__ = "conversations"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    peer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_chat_id = Column(Integer, ForeignKey("chats.id", ondelete="SET NULL"), nullable=True)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    last_chat = relationship("Chat")
+
+    __table_args__ = (
+        Index("ix_conversations_user_last", "user_id", "last_at"),
+    )
+
 class Request(Base):
     __tablename__ = "requests"
 
@@ -75,3 +125,10 @@ class Request(Base):
 
     requester = relationship("User", back_populates="requests")
     barangay = relationship("Barangay", back_populates="requests")
+
+    __table_args__ = (
+        Index("ix_requests_barangay_created", "barangay_id", "created_at"),
+        Index("ix_requests_barangay_status_created", "barangay_id", "status", "created_at"),
+        Index("ix_requests_requester_created", "requester_id", "created_at"),
+        Index("ix_requests_created", "created_at"),
+    )
@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Page size when the client does not ask for one, and the most it may ask for
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Keyset page of a list endpoint, newest first.
+
+    Rows are ordered by (created_at, id) descending; the cursor is the sort
+    key of the last row already returned, so each page is an index range
+    scan whatever its depth. Bodies stay plain JSON lists: the cursor for
+    the next page comes back in the X-Next-Cursor header (absent on the
+    last page).
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+        limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+        created_from: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+        created_to: Optional[datetime] = Query(None, description="Only rows created before this time"),
+    ):
+        self.cursor = decode_cursor(cursor) if cursor else None
+        self.limit = limit
+        self.created_from = as_naive_utc(created_from)
+        self.created_to = as_naive_utc(created_to)
+
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; convert client-supplied offsets to match."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    key = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(key.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("ascii").split("|")
+        return as_naive_utc(datetime.fromisoformat(created_at)), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def page_query(query, model, page: PageParams, keys=None):
+    """
+    ``query`` narrowed to one page: date range, keyset cursor, order and
+    limit (+1 to detect a next page). ``keys`` replaces (created_at, id) as
+    the (timestamp, integer) sort key.
+    """
+    created_at, row_id = keys or (model.created_at, model.id)
+    if page.created_from is not None:
+        query = query.where(created_at >= page.created_from)
+    if page.created_to is not None:
+        query = query.where(created_at < page.created_to)
+    if page.cursor is not None:
+        after_created_at, after_id = page.cursor
+        query = query.where(or_(
+            created_at < after_created_at,
+            and_(created_at == after_created_at, row_id < after_id),
+        ))
+    return query.order_by(created_at.desc(), row_id.desc()).limit(page.limit + 1)
+
+
+async def paginate(db: AsyncSession, query, model, page: PageParams, response: Response, keys=None) -> list:
+    """Run one page of ``query`` over ``model`` and set the next-page cursor header."""
+    rows = list((await db.execute(page_query(query, model, page, keys))).scalars().all())
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        created_at, row_id = keys or (model.created_at, model.id)
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, created_at.key), getattr(last, row_id.key))
+    return rows
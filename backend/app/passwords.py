@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def hash_password(password: str, rounds: int = 12) -> str:
+    """Hash password using bcrypt directly (compatible with Python 3.13)"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password using bcrypt directly (compatible with Python 3.13)"""
+    try:
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    except Exception as e:
+        logger.warning(f"Password verification error: {e}")
+        return False
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it is not one."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str, rounds: int) -> bool:
+    return hash_rounds(hashed_password) != rounds
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool, so a burst of logins queues
+    here instead of taking every threadpool thread the rest of the API needs.
+    bcrypt releases the GIL, so the workers hash in parallel.
+
+    At most ``max_queue`` hashes wait for a worker; beyond that callers get
+    503 straight away rather than piling up behind the burst.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_queue: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.run_total_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _run(self, submitted_at: float, function, *args):
+        started_at = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            wait_ms = (started_at - submitted_at) * 1000
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_total_ms += (time.perf_counter() - started_at) * 1000
+
+    async def _submit(self, function, *args):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-ins in progress, please try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+        try:
+            future = self._get_executor().submit(self._run, time.perf_counter(), function, *args)
+        except BaseException:
+            self._dequeue_cancelled(None)
+            raise
+        future.add_done_callback(self._dequeue_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _dequeue_cancelled(self, future: Optional[Future]):
+        # A job cancelled before a worker picked it up (the client went away,
+        # or shutdown) never reaches _run, so it leaves the queue here
+        if future is None or future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return needs_rehash(hashed_password, self.rounds)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_ms_mean": round(self.wait_total_ms / self.completed, 3) if self.completed else 0.0,
+                "wait_ms_max": round(self.wait_max_ms, 3),
+                "run_ms_mean": round(self.run_total_ms / self.completed, 3) if self.completed else 0.0,
+            }
+
+
+class LoginRateLimiter:
+    """
+    Sliding-window limit on login attempts per account, per worker. Checked
+    before any bcrypt work, so hammering one account cannot tie up the
+    hasher; a successful login clears the account's window.
+    """
+
+    def __init__(self, max_attempts: int, window: float, max_accounts: int = 10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_accounts = max_accounts
+        self._attempts: Dict[str, Deque[float]] = {}
+        self.limited = 0
+
+    def hit(self, account: str):
+        """Record an attempt for ``account``; raises 429 once the window is full."""
+        if self.max_attempts <= 0:
+            return
+        key = account.strip().lower()
+        now = time.monotonic()
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            if len(self._attempts) >= self.max_accounts:
+                self._prune(now)
+            attempts = self._attempts[key] = deque()
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if len(attempts) >= self.max_attempts:
+            self.limited += 1
+            retry_after = max(1, int(attempts[0] + self.window - now) + 1)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts for this account, please try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+        attempts.append(now)
+
+    def reset(self, account: str):
+        self._attempts.pop(account.strip().lower(), None)
+
+    def _prune(self, now: float):
+        for key in [key for key, attempts in self._attempts.items() if not attempts or attempts[-1] <= now - self.window]:
+            del self._attempts[key]
+        if len(self._attempts) >= self.max_accounts:
+            self._attempts.clear()
+
+    def stats(self) -> dict:
+        return {
+            "max_attempts": self.max_attempts,
+            "window": self.window,
+            "tracked_accounts": len(self._attempts),
+            "limited": self.limited,
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash_rounds, settings.password_hash_workers, settings.password_hash_queue,
+)
+login_limiter = LoginRateLimiter(settings.login_rate_limit, settings.login_rate_window)
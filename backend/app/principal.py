@@ -0,0 +1,77 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+
+class Principal:
+    """
+    The authenticated caller, built from signed token claims.
+
+    Carries what authorization needs (id, role, barangay) without loading
+    the user row; handlers that need the full user load it by ``id``.
+    """
+
+    __slots__ = ("id", "email", "role", "barangay_id", "token_version")
+
+    def __init__(self, id: int, email: str, role: str, barangay_id: Optional[int], token_version: int):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.barangay_id = barangay_id
+        self.token_version = token_version
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(user.id, user.email, user.role or "user", user.barangay_id, user.token_version or 0)
+
+    def claims(self) -> dict:
+        return {
+            "sub": self.email,
+            "id": self.id,
+            "role": self.role,
+            "barangay_id": self.barangay_id,
+            "ver": self.token_version,
+        }
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, role={self.role!r}, barangay_id={self.barangay_id})"
+
+
+class TokenVersionCache:
+    """
+    Per-worker cache of each user's (token_version, is_active), so checking
+    a token for revocation costs a primary-key lookup at most once per
+    ``ttl`` seconds per user. Changes made in this worker are seen at once;
+    other workers see them within ``ttl``.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[int, Tuple[float, Optional[Tuple[int, bool]]]] = {}
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[Tuple[int, bool]]:
+        """(token_version, is_active) for ``user_id``, or None when the user no longer exists."""
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        row = (await db.execute(
+            select(models.User.token_version, models.User.is_active).where(models.User.id == user_id)
+        )).first()
+        state = None if row is None else (row.token_version or 0, row.is_active is not False)
+        if len(self._entries) >= self.max_size:
+            self._entries.clear()
+        self._entries[user_id] = (now + self.ttl, state)
+        return state
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
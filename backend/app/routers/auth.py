@@ -1,75 +1,85 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 
 from .. import models, schemas
-from ..db import get_db
+from ..core.config import settings
+from ..db import get_async_db
+from ..passwords import login_limiter, password_hasher
+from ..principal import Principal, TokenVersionCache
 
 
-SECRET_KEY = "your_secret_key_here" 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+# Same, for endpoints that also serve anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
+# Current token version of each user, checked on every request
+token_versions = TokenVersionCache(settings.auth_version_cache_ttl)
 
-def verify_password(plain_password, hashed_password):
-    """Verify password using bcrypt directly (compatible with Python 3.13)"""
-    try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-    except Exception as e:
-        print(f"Password verification error: {e}")
-        return False
 
-def get_password_hash(password):
-    """Hash password using bcrypt directly (compatible with Python 3.13)"""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
-
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    user = result.scalars().first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
+    # Upgrade hashes made with an older cost factor while the password is at hand
+    if password_hasher.needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash(password)
+        await db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    login_limiter.hit(form_data.username)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email}, 
+    login_limiter.reset(form_data.username)
+    access_token = create_access_token(data=Principal.from_user(user).claims(),
                                        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def revoke_tokens(user: models.User):
+    """Invalidate every token issued to ``user`` so far; takes effect once the session commits."""
+    user.token_version = (user.token_version or 0) + 1
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """
+    The caller as a Principal built from the token's claims. The only
+    database access is the cached token-version check, so most requests
+    never touch the users table.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials. Please login again.",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -79,11 +89,77 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             detail=f"Invalid token: {str(e)}. Please login again.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
+
+    user_id = payload.get("id")
+    if user_id is None:
+        # Token issued before the claims were added: load the user the old way
+        result = await db.execute(select(models.User).where(models.User.email == email))
+        user = result.scalars().first()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"User with email {email} not found. Please login again.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return Principal.from_user(user)
+
+    state = await token_versions.get(db, user_id)
+    if state is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"User with email {email} not found. Please login again.",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    token_version, is_active = state
+    if token_version != payload.get("ver", 0) or not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked. Please login again.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Principal(user_id, email, payload.get("role") or "user", payload.get("barangay_id"), token_version)
+
+
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[Principal]:
+    """The caller, or None without a token; an invalid token is still a 401."""
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+
+async def get_current_user_record(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> models.User:
+    """The caller's full user row, for handlers that need more than the token claims."""
+    user = await db.get(models.User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"User with email {current_user.email} not found. Please login again.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
+
+
+@router.post("/logout-all")
+async def logout_all(user: models.User = Depends(get_current_user_record), db: AsyncSession = Depends(get_async_db)):
+    """Revoke every token issued to the current user, including this one"""
+    revoke_tokens(user)
+    await db.commit()
+    token_versions.invalidate(user.id)
+    return {"detail": "All sessions logged out"}
+
+
+@router.get("/password-pool")
+async def password_pool_stats(current_user: Principal = Depends(get_current_user)):
+    """bcrypt worker queue depth and timings, and login rate limiting, for this worker"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view password pool stats"
+        )
+    return {"hasher": password_hasher.stats(), "login_limiter": login_limiter.stats()}
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from .. import models, schemas
-from ..db import get_db
+from ..db import get_async_db
+from ..pagination import PageParams, paginate
+from ..scoping import get_scoped, scoped_select
+from ..stats import stats_cache
+from ..principal import Principal
 from ..routers.auth import get_current_user
 
 router = APIRouter(prefix="/cases", tags=["cases"])
 
 @router.post("/", response_model=schemas.CaseRead)
-def create_case(
+async def create_case(
     case: schemas.CaseCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     new_case = models.Case(
         title=case.title,
@@ -19,120 +23,71 @@ def create_case(
         reporter_id=current_user.id
     )
     db.add(new_case)
-    db.commit()
-    db.refresh(new_case)
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(new_case)
     return new_case
 
 @router.get("/", response_model=List[schemas.CaseRead])
-def get_cases(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def get_cases(
+    response: Response,
+    page: PageParams = Depends(),
+    barangay_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get all cases - filtered by role"""
-    if current_user.role == "superadmin":
-        return db.query(models.Case).all()
-    elif current_user.role == "admin":
-        if not current_user.barangay_id:
-            return []
-        return db.query(models.Case).join(models.User).filter(
-            models.User.barangay_id == current_user.barangay_id
-        ).all()
-    else:
-        return db.query(models.Case).filter(
-            models.Case.reporter_id == current_user.id
-        ).all()
+    """Get cases, newest first - filtered by role, one keyset page at a time"""
+    query = scoped_select(models.Case, current_user)
+    if barangay_id is not None and current_user.role == "superadmin":
+        query = query.join(models.User).where(models.User.barangay_id == barangay_id)
+    return await paginate(db, query, models.Case, page, response)
 
 @router.get("/{case_id}", response_model=schemas.CaseRead)
-def get_case(
+async def get_case(
     case_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    case = db.query(models.Case).filter(models.Case.id == case_id).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    # Check permissions
-    if current_user.role == "user":
-        # Users can only see their own cases
-        if case.reporter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to view this case"
-            )
-    elif current_user.role == "admin":
-        # Admins can only see cases from users in their barangay
-        reporter = db.query(models.User).filter(models.User.id == case.reporter_id).first()
-        if not reporter or reporter.barangay_id != current_user.barangay_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to view cases from other barangays"
-            )
-    
+    case = await get_scoped(
+        db, models.Case, case_id, current_user,
+        not_found="Case not found",
+        forbidden="Not authorized to view this case",
+    )
     return case
 
 @router.put("/{case_id}", response_model=schemas.CaseRead)
-def update_case(
+async def update_case(
     case_id: int, 
     updated_case: schemas.CaseUpdate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    case = db.query(models.Case).filter(models.Case.id == case_id).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    # Check permissions
-    if current_user.role == "user":
-        # Users can only update their own cases
-        if case.reporter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this case"
-            )
-    elif current_user.role == "admin":
-        # Admins can only update cases from users in their barangay
-        reporter = db.query(models.User).filter(models.User.id == case.reporter_id).first()
-        if not reporter or reporter.barangay_id != current_user.barangay_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update cases from other barangays"
-            )
+    case = await get_scoped(
+        db, models.Case, case_id, current_user,
+        not_found="Case not found",
+        forbidden="Not authorized to update this case",
+    )
 
     for key, value in updated_case.dict(exclude_unset=True).items():
         setattr(case, key, value)
 
-    db.commit()
-    db.refresh(case)
+    await db.commit()
+    await db.refresh(case)
     return case
 
 @router.delete("/{case_id}")
-def delete_case(
+async def delete_case(
     case_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    case = db.query(models.Case).filter(models.Case.id == case_id).first()
-    if not case:
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    # Check permissions
-    if current_user.role == "user":
-        # Users can only delete their own cases
-        if case.reporter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this case"
-            )
-    elif current_user.role == "admin":
-        # Admins can only delete cases from users in their barangay
-        reporter = db.query(models.User).filter(models.User.id == case.reporter_id).first()
-        if not reporter or reporter.barangay_id != current_user.barangay_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete cases from other barangays"
-            )
+    case = await get_scoped(
+        db, models.Case, case_id, current_user,
+        not_found="Case not found",
+        forbidden="Not authorized to delete this case",
+    )
     
-    db.delete(case)
-    db.commit()
+    await db.delete(case)
+    await db.commit()
+    stats_cache.invalidate()
     return {"detail": "Case deleted successfully"}
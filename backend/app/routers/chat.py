@@ -1,53 +1,297 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
 from datetime import datetime
+import asyncio
+import hashlib
+import json
+import logging
 from .. import models, schemas
-from ..db import get_db
-from ..chatbot import generate_chat_response, load_faq_data
+from ..chat_broker import CLOSE, chat_broker
+from ..chat_log import chat_log
+from ..conversations import record_chats
+from ..core.config import settings
+from ..db import AsyncSessionLocal, get_async_db
+from ..faq_payload import FaqPayload
+from ..pagination import PageParams, paginate
+from ..principal import Principal
+from ..routers.auth import get_current_user, get_optional_user
+from ..chatbot import (
+    ChatReply,
+    FaqSnapshot,
+    answer_cache,
+    generate_chat_reply,
+    generate_chat_replies,
+    find_matches,
+    get_snapshot,
+    is_reloading,
+    reload_faq_data_in_background,
+    tier_counts,
+)
 
 router = APIRouter(prefix="/chats", tags=["chats"])
 
+logger = logging.getLogger(__name__)
+
+# Questions answered per NDJSON chunk when /ai/batch streams
+BATCH_STREAM_CHUNK = 32
+
+# Largest page of categories GET /chats/faq returns at once
+FAQ_PAGE_LIMIT = 50
+
+# Most results GET /chats/search and GET /chats/suggest return
+SEARCH_RESULT_LIMIT = 20
+
+# Most missed messages /chats/ws replays on connect (?since_id=)
+SOCKET_BACKLOG_LIMIT = 200
+
+# Chats between users; saved chatbot exchanges (app.chat_log) are left out
+USER_CHATS = models.Chat.is_bot.is_(False)
+
 @router.post("/", response_model=schemas.ChatRead)
-def create_chat(chat: schemas.ChatCreate, db: Session = Depends(get_db)):
-    sender = db.query(models.User).filter(models.User.id == chat.sender_id).first()
-    receiver = db.query(models.User).filter(models.User.id == chat.receiver_id).first()
-    if not sender or not receiver:
-        raise HTTPException(status_code=404, detail="Sender or receiver not found")
+async def create_chat(
+    chat: schemas.ChatCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Send a message as the current user; it is pushed to both users' open chat sockets"""
+    if chat.sender_id is not None and chat.sender_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only send messages as yourself"
+        )
+    receiver = await db.get(models.User, chat.receiver_id)
+    if not receiver:
+        raise HTTPException(status_code=404, detail="Receiver not found")
 
     new_chat = models.Chat(
-        sender_id=chat.sender_id,
+        sender_id=current_user.id,
         receiver_id=chat.receiver_id,
         message=chat.message,
         created_at=datetime.utcnow()
     )
     db.add(new_chat)
-    db.commit()
-    db.refresh(new_chat)
+    await db.flush()
+    await db.run_sync(record_chats, [new_chat])
+    await db.commit()
+    await db.refresh(new_chat)
+    await chat_broker.publish(
+        (new_chat.sender_id, new_chat.receiver_id),
+        schemas.ChatRead.model_validate(new_chat).model_dump(mode="json"),
+    )
     return new_chat
 
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: str, since_id: Optional[int] = None):
+    """
+    Push new chats the user sends or receives, as ChatRead JSON, instead of
+    polling GET /chats/. Browsers cannot set headers on a WebSocket, so the
+    access token comes as ?token=. With ?since_id=, chats after that id are
+    sent first (up to SOCKET_BACKLOG_LIMIT), so a reconnecting client misses
+    nothing. Messages from the client are ignored.
+    """
+    # Short-lived session: a connection may stay open for hours and must
+    # not hold a pooled database connection all that time
+    async with AsyncSessionLocal() as db:
+        try:
+            current_user = await get_current_user(token, db)
+        except HTTPException as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail)[:120])
+            return
+        queue = await chat_broker.subscribe(current_user.id)
+        # Unsubscribed in the finally below, or here if the backlog read fails
+        try:
+            backlog = []
+            if since_id is not None:
+                backlog = (await db.execute(
+                    select(models.Chat)
+                    .where(
+                        or_(models.Chat.sender_id == current_user.id, models.Chat.receiver_id == current_user.id),
+                        models.Chat.id > since_id,
+                        USER_CHATS,
+                    )
+                    .order_by(models.Chat.id)
+                    .limit(SOCKET_BACKLOG_LIMIT)
+                )).scalars().all()
+                backlog = [schemas.ChatRead.model_validate(chat).model_dump(mode="json") for chat in backlog]
+        except BaseException:
+            await chat_broker.unsubscribe(current_user.id, queue)
+            raise
+
+    async def forward():
+        # Skip anything published while the backlog was being read
+        last_id = backlog[-1]["id"] if backlog else 0
+        for message in backlog:
+            await websocket.send_json(message)
+        while True:
+            message = await queue.get()
+            if message is CLOSE:
+                # Too far behind, or shutting down: the client reconnects with since_id
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            if message["id"] > last_id:
+                await websocket.send_json(message)
+
+    async def until_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    try:
+        await websocket.accept()
+        tasks = [asyncio.create_task(forward()), asyncio.create_task(until_disconnect())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                # A send to a client that just went away
+                logger.debug(f"Chat socket of user {current_user.id} ended: {task.exception()!r}")
+    finally:
+        await chat_broker.unsubscribe(current_user.id, queue)
+
+@router.get("/ws/stats")
+def get_socket_stats(current_user: Principal = Depends(get_current_user)):
+    """Connected chat sockets and messages delivered and dropped by this worker"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view chat socket stats"
+        )
+    return chat_broker.stats()
+
 @router.get("/", response_model=List[schemas.ChatRead])
-def get_all_chats(db: Session = Depends(get_db)):
-    return db.query(models.Chat).all()
+async def get_all_chats(
+    response: Response,
+    page: PageParams = Depends(),
+    peer_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Chats the current user sent or received, newest first (superadmin: every chat)"""
+    query = select(models.Chat).where(USER_CHATS)
+    if current_user.role != "superadmin":
+        query = query.where(or_(
+            models.Chat.sender_id == current_user.id,
+            models.Chat.receiver_id == current_user.id,
+        ))
+    if peer_id is not None:
+        query = query.where(or_(
+            models.Chat.sender_id == peer_id,
+            models.Chat.receiver_id == peer_id,
+        ))
+    return await paginate(db, query, models.Chat, page, response)
 
-@router.get("/{chat_id}", response_model=schemas.ChatRead)
-def get_chat(chat_id: int, db: Session = Depends(get_db)):
-    chat = db.query(models.Chat).filter(models.Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
-    return chat
+@router.get("/conversations", response_model=List[schemas.ConversationRead])
+async def get_conversations(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    The current user's conversations, most recent activity first, with the
+    last message and unread count of each. Read from the summary rows kept
+    by POST /chats/, so the cost does not grow with the number of chats.
+    """
+    query = (
+        select(models.Conversation)
+        .where(models.Conversation.user_id == current_user.id)
+        .options(joinedload(models.Conversation.last_chat))
+    )
+    keys = (models.Conversation.last_at, models.Conversation.peer_id)
+    return await paginate(db, query, models.Conversation, page, response, keys)
+
+@router.get("/conversations/{peer_id}", response_model=List[schemas.ChatRead])
+async def get_conversation(
+    peer_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Messages between the current user and peer_id, newest first, one keyset page at a time"""
+    query = select(models.Chat).where(
+        models.Chat.user_low_id == min(current_user.id, peer_id),
+        models.Chat.user_high_id == max(current_user.id, peer_id),
+        USER_CHATS,
+    )
+    return await paginate(db, query, models.Chat, page, response)
+
+@router.post("/conversations/{peer_id}/read")
+async def mark_conversation_read(
+    peer_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Reset the unread count of the conversation with peer_id"""
+    await db.execute(
+        update(models.Conversation)
+        .where(models.Conversation.user_id == current_user.id, models.Conversation.peer_id == peer_id)
+        .values(unread_count=0)
+    )
+    await db.commit()
+    return {"detail": "Conversation marked as read"}
+
+def select_faq(data: dict, categories: Optional[List[str]], offset: int, limit: Optional[int]) -> dict:
+    """The part of the FAQ a GET /chats/faq call asked for."""
+    selected = data.get('categories', [])
+    if categories:
+        wanted = set(categories)
+        selected = [category for category in selected if category.get('name') in wanted]
+    if limit is None and not offset:
+        return {"categories": selected}
+    end = offset + limit if limit is not None else None
+    return {"categories": selected[offset:end], "total": len(selected), "offset": offset, "limit": limit}
+
+def faq_response(request: Request, snapshot: FaqSnapshot, key: str, build) -> Response:
+    """Serve a cached, pre-compressed FAQ payload, or a 304 if the client has it."""
+    def build_payload():
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+        return FaqPayload(build(), f'W/"{snapshot.version}-{digest}"')
+    
+    payload = snapshot.payloads.get_or_build(key, build_payload)
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": "public, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if payload.matches(request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    encoding, body = payload.negotiate(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def get_snapshot_or_404() -> FaqSnapshot:
+    snapshot = get_snapshot()
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="FAQ data not available"
+        )
+    return snapshot
 
 @router.get("/faq")
-def get_faq_data():
-    """Get FAQ data (categories and questions)"""
+def get_faq_data(
+    request: Request,
+    category: Optional[List[str]] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=FAQ_PAGE_LIMIT)
+):
+    """
+    Get FAQ data (categories and questions).
+    Filter with ?category=<name> (repeatable) or page with ?offset=&limit=
+    to load categories lazily. Responses carry an ETag and are served
+    gzip/brotli compressed when the client accepts it.
+    """
+    snapshot = get_snapshot_or_404()
     try:
-        faq_data = load_faq_data()
-        if faq_data is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="FAQ data not available"
-            )
-        return faq_data
+        key = json.dumps(["faq", sorted(category or []), offset, limit])
+        return faq_response(request, snapshot, key, lambda: select_faq(snapshot.data, category, offset, limit))
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -57,10 +301,99 @@ def get_faq_data():
             detail=f"Failed to load FAQ data: {str(e)}"
         )
 
+@router.get("/faq/categories")
+def get_faq_categories(request: Request):
+    """Category names and question counts, for loading the FAQ one category at a time"""
+    snapshot = get_snapshot_or_404()
+    return faq_response(request, snapshot, "categories", lambda: [
+        {"name": category.get('name', ''), "questions": len(category.get('questions', []))}
+        for category in snapshot.data.get('categories', [])
+    ])
+
+def ai_reply_payload(chat: schemas.ChatbotMessage, reply: ChatReply) -> dict:
+    # receiver_id None is the chatbot, as on saved bot chats
+    return {
+        "message": reply.message,
+        "sender_id": chat.sender_id,
+        "receiver_id": None,
+        "tier": reply.tier
+    }
+
+@router.get("/search")
+def search_faq(
+    q: str = Query(..., min_length=1),
+    category: Optional[List[str]] = Query(None),
+    k: int = Query(5, ge=1, le=SEARCH_RESULT_LIMIT),
+    min_score: float = Query(0.0, ge=0.0, le=1.0)
+):
+    """
+    Search the FAQ questions. Repeat ?category= to score only those
+    categories. Returns the top-k questions with their scores, plus how many
+    questions in each category match the query, for facet counts in the UI.
+    """
+    snapshot = get_snapshot_or_404()
+    matches = find_matches(q, top_k=k, min_score=min_score, categories=category)
+    return {
+        "query": q,
+        "results": [
+            {
+                "question": match.question,
+                "answer": match.answer,
+                "category": match.category,
+                "score": round(match.score, 4),
+            }
+            for match in matches
+        ],
+        "facets": snapshot.index.facets(q),
+    }
+
+@router.get("/suggest")
+def suggest_questions(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(8, ge=1, le=SEARCH_RESULT_LIMIT)
+):
+    """
+    Typeahead: FAQ questions completing what the resident has typed so far.
+    Answers within settings.suggest_budget_ms; "truncated" is true when the
+    budget ran out before every prefix match was collected.
+    """
+    snapshot = get_snapshot_or_404()
+    suggestions = snapshot.suggest.suggest(q, limit=limit, budget_ms=settings.suggest_budget_ms)
+    return {
+        "query": q,
+        "suggestions": [
+            {
+                "question": snapshot.index.questions[position],
+                "category": snapshot.index.categories[position],
+            }
+            for position in suggestions.positions
+        ],
+        "truncated": suggestions.truncated,
+    }
+
+@router.get("/faq/status")
+def get_faq_status():
+    """Version and build time of the active FAQ index"""
+    snapshot = get_snapshot_or_404()
+    return {**snapshot.info(), "reloading": is_reloading()}
+
+@router.post("/faq/reload", status_code=status.HTTP_202_ACCEPTED)
+def reload_faq(current_user: Principal = Depends(get_current_user)):
+    """Rebuild the FAQ index from the file in the background (superadmin only)"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can reload the FAQ"
+        )
+    started = reload_faq_data_in_background()
+    return {"detail": "FAQ reload started" if started else "FAQ reload already in progress"}
+
 @router.post("/ai", response_model=dict)
-def chat_with_ai(chat: schemas.ChatCreate, db: Session = Depends(get_db)):
+def chat_with_ai(chat: schemas.ChatbotMessage, current_user: Optional[Principal] = Depends(get_optional_user)):
     """
-    Simple AI endpoint that returns the response directly without saving to database.
+    Simple AI endpoint that returns the response directly. For a signed-in
+    caller the exchange is saved afterwards, in the background (see
+    app.chat_log); anonymous questions are answered but not saved.
     """
     import logging
     logger = logging.getLogger(__name__)
@@ -71,21 +404,109 @@ def chat_with_ai(chat: schemas.ChatCreate, db: Session = Depends(get_db)):
         logger.info("Generating AI response...")
         
         try:
-            ai_response = generate_chat_response(chat.message)
+            reply = generate_chat_reply(chat.message)
+            ai_response, tier = reply.message, reply.tier
             logger.info(f"Generated response: {ai_response[:50]}...")
         except Exception as ai_error:
             logger.error(f"Error generating AI response: {ai_error}")
             ai_response = f"Thank you for your message: '{chat.message}'. I'm the Barangay Legal Aid chatbot. Please contact the barangay office directly for assistance."
+            tier = "error"
         
+        if current_user:
+            chat_log.record(current_user.id, chat.message, ai_response)
         return {
             "message": ai_response,
             "sender_id": chat.sender_id,
-            "receiver_id": getattr(chat, 'receiver_id', 1)
+            "receiver_id": None,
+            "tier": tier
         }
     except Exception as e:
         logger.error(f"Unexpected error in chat_with_ai: {str(e)}", exc_info=True)
         return {
             "message": "I apologize, but I encountered an error. Please try again or contact the barangay office directly.",
             "sender_id": chat.sender_id,
-            "receiver_id": getattr(chat, 'receiver_id', 1)
+            "receiver_id": None,
+            "tier": "error"
         }
+
+@router.post("/ai/batch")
+def chat_with_ai_batch(
+    chats: List[schemas.ChatbotMessage],
+    stream: bool = False,
+    current_user: Optional[Principal] = Depends(get_optional_user)
+):
+    """
+    Answer many chatbot questions in one request, in the order given.
+    With ?stream=true the answers are sent as NDJSON, one line per question,
+    so the first answers arrive before the whole batch is done. Saved like
+    POST /chats/ai.
+    """
+    if len(chats) > settings.chatbot_batch_limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.chatbot_batch_limit} messages per batch"
+        )
+    
+    def answer(chunk: List[schemas.ChatbotMessage]) -> List[ChatReply]:
+        replies = generate_chat_replies([chat.message for chat in chunk])
+        if current_user:
+            for chat, reply in zip(chunk, replies):
+                chat_log.record(current_user.id, chat.message, reply.message)
+        return replies
+    
+    if not stream:
+        return [ai_reply_payload(chat, reply) for chat, reply in zip(chats, answer(chats))]
+    
+    def ndjson_lines():
+        for start in range(0, len(chats), BATCH_STREAM_CHUNK):
+            chunk = chats[start:start + BATCH_STREAM_CHUNK]
+            for chat, reply in zip(chunk, answer(chunk)):
+                yield json.dumps(ai_reply_payload(chat, reply)) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@router.get("/ai/tiers")
+def get_ai_tier_counts(current_user: Principal = Depends(get_current_user)):
+    """How many chatbot replies each threshold tier produced since startup"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view chatbot tier counts"
+        )
+    return dict(tier_counts)
+
+@router.get("/ai/log")
+def get_ai_log_stats(current_user: Principal = Depends(get_current_user)):
+    """Chatbot exchanges waiting to be saved, written, dropped and failed"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view chat log stats"
+        )
+    return chat_log.stats()
+
+@router.get("/ai/cache")
+def get_ai_cache_stats(current_user: Principal = Depends(get_current_user)):
+    """Chatbot answer cache size and hit/miss/eviction counters"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view chatbot answer cache stats"
+        )
+    return answer_cache.stats()
+
+@router.get("/{chat_id}", response_model=schemas.ChatRead)
+async def get_chat(
+    chat_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """One chat the current user sent or received (superadmin: any chat)"""
+    chat = await db.get(models.Chat, chat_id)
+    # 404 rather than 403, so other users' chat ids cannot be probed
+    if not chat or chat.is_bot or (
+        current_user.role != "superadmin"
+        and current_user.id not in (chat.sender_id, chat.receiver_id)
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+    return chat
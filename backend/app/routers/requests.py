@@ -1,19 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 
 from .. import models, schemas
-from ..db import get_db
+from ..db import get_async_db
+from ..pagination import PageParams, as_naive_utc, paginate
+from ..scoping import get_scoped, scope_condition, scoped_select
+from ..stats import stats_cache
+from ..principal import Principal
 from ..routers.auth import get_current_user
 
 router = APIRouter(prefix="/requests", tags=["requests"])
 
+# Most requests one bulk update touches
+MAX_BULK_REQUESTS = 1000
+
 @router.post("/", response_model=schemas.RequestRead)
-def create_request(
+async def create_request(
     request: schemas.RequestCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new document request"""
     new_request = models.Request(
@@ -24,105 +32,167 @@ def create_request(
         status="pending"
     )
     db.add(new_request)
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(new_request)
     return new_request
 
 @router.get("/", response_model=List[schemas.RequestRead])
-def get_requests(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def get_requests(
+    response: Response,
+    page: PageParams = Depends(),
+    request_status: Optional[str] = Query(None, alias="status"),
+    document_type: Optional[str] = None,
+    barangay_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get all requests - filtered by role"""
+    """Get requests, newest first - filtered by role, one keyset page at a time"""
     try:
-        if current_user.role == "superadmin":
-            return db.query(models.Request).all()
-        elif current_user.role == "admin":
-            # Admins only see requests from their barangay
-            if not current_user.barangay_id:
-                return []
-            return db.query(models.Request).filter(
-                models.Request.barangay_id == current_user.barangay_id
-            ).all()
-        else:
-            # Users only see their own requests
-            return db.query(models.Request).filter(
-                models.Request.requester_id == current_user.id
-            ).all()
+        query = scoped_select(models.Request, current_user)
+        if request_status is not None:
+            query = query.where(models.Request.status == request_status)
+        if document_type is not None:
+            query = query.where(models.Request.document_type == document_type)
+        if barangay_id is not None:
+            query = query.where(models.Request.barangay_id == barangay_id)
+        return await paginate(db, query, models.Request, page, response)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching requests: {str(e)}"
         )
 
+@router.put("/bulk", response_model=schemas.RequestBulkResult)
+async def bulk_update_requests(
+    bulk_update: schemas.RequestBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Set the status of many requests at once (only for admins), given their
+    ids or a filter. The rows are read and locked with one SELECT, updated
+    with one UPDATE that repeats the barangay scope, and committed together;
+    the response has an outcome per id. A filter updates at most
+    MAX_BULK_REQUESTS requests, oldest first, per call.
+    """
+    if current_user.role not in ["admin", "superadmin"]:
+        raise HTTPException(status_code=403, detail="Only admins can update requests")
+    if bulk_update.ids is not None and len(bulk_update.ids) > MAX_BULK_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_REQUESTS} requests per call"
+        )
+
+    scope = scope_condition(models.Request, current_user)
+    truncated = False
+    if bulk_update.ids is not None:
+        ids = list(dict.fromkeys(bulk_update.ids))
+        query = (
+            select(models.Request.id, models.Request.status, scope.label("in_scope"))
+            .where(models.Request.id.in_(ids))
+        )
+        rows = (await db.execute(query.with_for_update())).all()
+    else:
+        criteria = bulk_update.filter
+        query = select(models.Request.id, models.Request.status, true().label("in_scope")).where(scope)
+        if criteria.status is not None:
+            query = query.where(models.Request.status == criteria.status)
+        if criteria.document_type is not None:
+            query = query.where(models.Request.document_type == criteria.document_type)
+        if criteria.barangay_id is not None:
+            query = query.where(models.Request.barangay_id == criteria.barangay_id)
+        if criteria.created_from is not None:
+            query = query.where(models.Request.created_at >= as_naive_utc(criteria.created_from))
+        if criteria.created_to is not None:
+            query = query.where(models.Request.created_at < as_naive_utc(criteria.created_to))
+        query = query.order_by(models.Request.created_at, models.Request.id).limit(MAX_BULK_REQUESTS + 1)
+        rows = (await db.execute(query.with_for_update())).all()
+        truncated = len(rows) > MAX_BULK_REQUESTS
+        rows = rows[:MAX_BULK_REQUESTS]
+        ids = [row.id for row in rows]
+
+    found = {row.id: row for row in rows}
+    results = []
+    to_update = []
+    for request_id in ids:
+        row = found.get(request_id)
+        if row is None:
+            outcome = "not_found"
+        elif not row.in_scope:
+            outcome = "forbidden"
+        elif row.status == bulk_update.status:
+            outcome = "unchanged"
+        else:
+            outcome = "updated"
+            to_update.append(request_id)
+        results.append({"id": request_id, "outcome": outcome})
+
+    if to_update:
+        await db.execute(
+            update(models.Request)
+            .where(models.Request.id.in_(to_update), scope)
+            .values(status=bulk_update.status, updated_at=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    stats_cache.invalidate()
+    return {"status": bulk_update.status, "updated": len(to_update), "results": results, "truncated": truncated}
+
 @router.get("/{request_id}", response_model=schemas.RequestRead)
-def get_request(
+async def get_request(
     request_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific request"""
-    request = db.query(models.Request).filter(models.Request.id == request_id).first()
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-    
-    # Check permissions
-    if current_user.role == "user":
-        if request.requester_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-    elif current_user.role == "admin":
-        if request.barangay_id != current_user.barangay_id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-    
-    return request
+    return await get_scoped(
+        db, models.Request, request_id, current_user,
+        not_found="Request not found",
+        forbidden="Not authorized",
+    )
 
 @router.put("/{request_id}", response_model=schemas.RequestRead)
-def update_request(
+async def update_request(
     request_id: int,
     request_update: schemas.RequestUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update request status (only for admins)"""
     if current_user.role not in ["admin", "superadmin"]:
         raise HTTPException(status_code=403, detail="Only admins can update requests")
     
-    request = db.query(models.Request).filter(models.Request.id == request_id).first()
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-    
-    # Check if admin is from the same barangay
-    if current_user.role == "admin":
-        if request.barangay_id != current_user.barangay_id:
-            raise HTTPException(status_code=403, detail="Not authorized for this barangay")
+    request = await get_scoped(
+        db, models.Request, request_id, current_user,
+        not_found="Request not found",
+        forbidden="Not authorized for this barangay",
+    )
     
     if request_update.status:
         request.status = request_update.status
         request.updated_at = datetime.now()
     
-    db.commit()
-    db.refresh(request)
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(request)
     return request
 
 @router.delete("/{request_id}")
-def delete_request(
+async def delete_request(
     request_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete a request"""
-    request = db.query(models.Request).filter(models.Request.id == request_id).first()
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-    
-    # Check permissions
-    if current_user.role == "user" and request.requester_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    if current_user.role == "admin" and request.barangay_id != current_user.barangay_id:
-        raise HTTPException(status_code=403, detail="Not authorized for this barangay")
+    request = await get_scoped(
+        db, models.Request, request_id, current_user,
+        not_found="Request not found",
+        forbidden="Not authorized" if current_user.role == "user" else "Not authorized for this barangay",
+    )
     
-    db.delete(request)
-    db.commit()
+    await db.delete(request)
+    await db.commit()
+    stats_cache.invalidate()
     return {"detail": "Request deleted successfully"}
 
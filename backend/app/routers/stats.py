@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_db
+from ..principal import Principal
+from ..routers.auth import get_current_user
+from ..stats import DEFAULT_STATS_DAYS, MAX_STATS_DAYS, stats_cache
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+@router.get("/")
+async def get_stats(
+    days: int = Query(DEFAULT_STATS_DAYS, ge=1, le=MAX_STATS_DAYS, description="Days of per-day counts"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Dashboard counts of requests, cases and users - filtered by role like the list endpoints"""
+    return await stats_cache.get(db, current_user, days)
+
+@router.get("/cache")
+async def stats_cache_stats(current_user: Principal = Depends(get_current_user)):
+    """Hit rate and size of this worker's /stats/ cache"""
+    if current_user.role != "superadmin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superadmin can view stats cache"
+        )
+    return stats_cache.stats()
@@ -1,28 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from .. import models, schemas
-from ..db import get_db
-from ..routers.auth import get_current_user
-import bcrypt
+from ..bulk_import import UserImport, chunked, detect_format, read_rows
+from ..core.config import settings
+from ..db import AsyncSessionLocal, get_async_db
+from ..pagination import PageParams, paginate
+from ..passwords import password_hasher
+from ..scoping import get_scoped, scoped_select
+from ..stats import stats_cache
+from ..principal import Principal
+from ..routers.auth import get_current_user, revoke_tokens, token_versions
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import io
+import json
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt directly (compatible with Python 3.13)"""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
-
-
 @router.post("/", response_model=schemas.UserRead)
-def create_user(
+async def create_user(
     user: schemas.UserCreate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     requested_role = user.role or "user"
     if requested_role in ["admin", "superadmin"]:
@@ -32,12 +37,12 @@ def create_user(
                 detail="Only superadmin can create admin or superadmin users"
             )
     
-    if db.query(models.User).filter(models.User.email == user.email).first():
+    if await db.scalar(select(models.User.id).where(models.User.email == user.email)):
         raise HTTPException(status_code=400, detail="Email already registered")
-    if db.query(models.User).filter(models.User.username == user.username).first():
+    if await db.scalar(select(models.User.id).where(models.User.username == user.username)):
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await password_hasher.hash(user.password)
 
     new_user = models.User(
         email=user.email,
@@ -53,69 +58,107 @@ def create_user(
 
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        stats_cache.invalidate()
+        await db.refresh(new_user)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database insertion error: {str(e)}")
 
     return new_user
 
 
-@router.get("/", response_model=List[schemas.UserRead])
-def read_users(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+@router.post("/import")
+async def import_users(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$", description="Defaults from the file name, else csv"),
+    dry_run: bool = False,
+    create_barangays: bool = False,
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get all users - filtered by role"""
+    """
+    Bulk-create users from a CSV (header row) or JSON Lines file with the
+    fields of POST /users/, plus an optional "barangay" name. Streams one
+    NDJSON result per input row as each chunk is committed, then a summary.
+    Admins import plain users into their own barangay only.
+    """
     if current_user.role == "superadmin":
-        return db.query(models.User).all()
-    elif current_user.role == "admin":
-        if not current_user.barangay_id:
-            return []
-        return db.query(models.User).filter(
-            models.User.barangay_id == current_user.barangay_id
-        ).all()
+        job = UserImport(create_barangays=create_barangays, dry_run=dry_run)
+    elif current_user.role == "admin" and current_user.barangay_id:
+        job = UserImport(role="user", barangay_id=current_user.barangay_id, dry_run=dry_run)
     else:
-        return [current_user]
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can import users"
+        )
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    rows = read_rows(stream, detect_format(file.filename, format))
+
+    async def results():
+        # Own session: the response outlives the request's dependencies
+        async with AsyncSessionLocal() as db:
+            with ThreadPoolExecutor(settings.import_hash_workers, thread_name_prefix="import-bcrypt") as executor:
+                for chunk in chunked(rows):
+                    job.validate(chunk)
+                    await db.run_sync(job.check, chunk)
+                    await run_in_threadpool(job.hash_passwords, chunk, executor, settings.password_hash_rounds)
+                    await db.run_sync(job.insert, chunk)
+                    stats_cache.invalidate()
+                    yield "".join(json.dumps(result) + "\n" for result in job.tally(chunk))
+        yield json.dumps(job.summary()) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/", response_model=List[schemas.UserRead])
+async def read_users(
+    response: Response,
+    page: PageParams = Depends(),
+    role: Optional[str] = None,
+    barangay_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get users, newest first - filtered by role, one keyset page at a time"""
+    if current_user.role == "user":
+        # The account may have been deleted since the token was issued
+        user = await db.get(models.User, current_user.id)
+        return [user] if user is not None else []
+    query = scoped_select(models.User, current_user)
+    if role is not None:
+        query = query.where(models.User.role == role)
+    if barangay_id is not None:
+        query = query.where(models.User.barangay_id == barangay_id)
+    return await paginate(db, query, models.User, page, response)
 
 
 @router.get("/{user_id}", response_model=schemas.UserRead)
-def read_user(
+async def read_user(
     user_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    if current_user.role == "user":
-        if user.id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to view this user"
-            )
-    elif current_user.role == "admin":
-        if user.barangay_id != current_user.barangay_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to view users from other barangays"
-            )
-    
-    return user
+    return await get_scoped(
+        db, models.User, user_id, current_user,
+        not_found="User not found",
+        forbidden="Not authorized to view this user" if current_user.role == "user"
+        else "Not authorized to view users from other barangays",
+    )
 
 
 @router.put("/{user_id}", response_model=schemas.UserRead)
-def update_user(
+async def update_user(
     user_id: int, 
     user_update: schemas.UserUpdate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = await get_scoped(
+        db, models.User, user_id, current_user,
+        not_found="User not found",
+        forbidden="Users can only update their own profile" if current_user.role == "user"
+        else "Admins can only update users from their own barangay",
+    )
     
     # Prevent modification of superadmin accounts by non-superadmins
     if user.role == "superadmin" and current_user.role != "superadmin":
@@ -140,13 +183,7 @@ def update_user(
                 detail="Only superadmin can change user role to admin or superadmin"
             )
     
-    # Admins can only update users from their barangay
     if current_user.role == "admin":
-        if user.barangay_id != current_user.barangay_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Admins can only update users from their own barangay"
-            )
         # Admins cannot change barangay_id
         if user_update.barangay_id and user_update.barangay_id != user.barangay_id:
             raise HTTPException(
@@ -154,13 +191,7 @@ def update_user(
                 detail="Admins cannot change user barangay"
             )
     
-    # Users can only update their own profile
     if current_user.role == "user":
-        if user.id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Users can only update their own profile"
-            )
         # Users cannot change their role or barangay_id
         if user_update.role and user_update.role != user.role:
             raise HTTPException(
@@ -173,26 +204,42 @@ def update_user(
                 detail="Users cannot change their barangay"
             )
 
-    for attr, value in user_update.dict(exclude_unset=True).items():
+    changes = user_update.dict(exclude_unset=True)
+    # Tokens carry the email, role and barangay; revoke them when those (or the password) change
+    revoke = bool(changes.get("password")) or any(
+        attr in changes and changes[attr] != getattr(user, attr)
+        for attr in ("email", "role", "barangay_id")
+    )
+    for attr, value in changes.items():
         if attr == "password" and value:
-            setattr(user, "hashed_password", hash_password(value))
+            setattr(user, "hashed_password", await password_hasher.hash(value))
         else:
             setattr(user, attr, value)
-
-    db.commit()
-    db.refresh(user)
+    if revoke:
+        revoke_tokens(user)
+
+    await db.commit()
+    stats_cache.invalidate()
+    if revoke:
+        token_versions.invalidate(user.id)
+    await db.refresh(user)
     return user
 
 
 @router.delete("/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # Load the cascaded collections up front; async sessions cannot lazy-load them during delete
+    user = await get_scoped(
+        db, models.User, user_id, current_user,
+        not_found="User not found",
+        forbidden="Users can only delete their own account" if current_user.role == "user"
+        else "Admins can only delete users from their own barangay",
+        options=[selectinload(models.User.cases), selectinload(models.User.requests)],
+    )
     
     # Prevent deletion of superadmin accounts
     if user.role == "superadmin":
@@ -200,15 +247,9 @@ def delete_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Superadmin accounts cannot be deleted"
         )
-    
-    # Admins can only delete users from their barangay
-    if current_user.role == "admin":
-        if user.barangay_id != current_user.barangay_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Admins can only delete users from their own barangay"
-            )
 
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    stats_cache.invalidate()
+    token_versions.invalidate(user_id)
     return {"detail": "User deleted successfully"}
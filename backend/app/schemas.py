@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -86,17 +86,38 @@ class BarangayRead(BarangayBase):
 
 #CHAT SCHEMAS
 class ChatCreate(BaseModel):
-    sender_id: int
+    # Messages are sent as the authenticated user; if given, must be that user
+    sender_id: Optional[int] = None
     receiver_id: int
     message: str
 
 class ChatRead(ChatCreate):
+    # None is the chatbot, on is_bot rows
+    sender_id: Optional[int] = None
+    receiver_id: Optional[int] = None
+    is_bot: bool = False
     id: int
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class ChatbotMessage(BaseModel):
+    # sender_id is only echoed back in the reply; the exchange is saved for
+    # the authenticated user, if any. A receiver_id sent by older clients is
+    # ignored: the chatbot is always the receiver
+    sender_id: Optional[int] = None
+    message: str
+
+class ConversationRead(BaseModel):
+    peer_id: int
+    last_chat: Optional[ChatRead] = None
+    last_at: datetime
+    unread_count: int
+
+    class Config:
+        from_attributes = True
+
 # REQUEST SCHEMAS
 class RequestBase(BaseModel):
     document_type: str
@@ -109,6 +130,37 @@ class RequestCreate(RequestBase):
 class RequestUpdate(BaseModel):
     status: Optional[str] = None
 
+class RequestBulkFilter(BaseModel):
+    # Same filters as GET /requests/
+    status: Optional[str] = None
+    document_type: Optional[str] = None
+    barangay_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class RequestBulkUpdate(BaseModel):
+    """Target status for the requests in ``ids``, or for those matching ``filter``"""
+    status: str
+    ids: Optional[List[int]] = None
+    filter: Optional[RequestBulkFilter] = None
+
+    @model_validator(mode='after')
+    def ids_or_filter(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Give either ids or filter")
+        return self
+
+class RequestBulkOutcome(BaseModel):
+    id: int
+    outcome: str  # updated, unchanged, not_found or forbidden
+
+class RequestBulkResult(BaseModel):
+    status: str
+    updated: int
+    results: List[RequestBulkOutcome]
+    # More requests matched the filter than one call updates; call again
+    truncated: bool = False
+
 class RequestRead(RequestBase):
     id: int
     requester_id: int
@@ -0,0 +1,90 @@
+from typing import List, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import false, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+# Who may see or change what:
+#   superadmin  everything
+#   admin       rows belonging to their barangay (cases through the reporter)
+#   user        their own rows
+
+
+def _scope(model, current_user) -> Tuple[object, List[tuple]]:
+    """SQL condition for rows of ``model`` that ``current_user`` may access, and the joins it needs."""
+    role = current_user.role
+    if role == "superadmin":
+        return true(), []
+    if role == "admin" and not current_user.barangay_id:
+        return false(), []
+
+    if model is models.Case:
+        if role == "admin":
+            return models.User.barangay_id == current_user.barangay_id, [
+                (models.User, models.Case.reporter_id == models.User.id),
+            ]
+        return models.Case.reporter_id == current_user.id, []
+    if model is models.Request:
+        if role == "admin":
+            return models.Request.barangay_id == current_user.barangay_id, []
+        return models.Request.requester_id == current_user.id, []
+    if model is models.User:
+        if role == "admin":
+            return models.User.barangay_id == current_user.barangay_id, []
+        return models.User.id == current_user.id, []
+    raise ValueError(f"No access scope defined for {model.__name__}")
+
+
+def scope_condition(model, current_user):
+    """
+    The scope condition alone, for set-based UPDATE and DELETE statements,
+    which cannot carry a join.
+    """
+    scope, joins = _scope(model, current_user)
+    if joins:
+        raise ValueError(f"The access scope of {model.__name__} needs a join")
+    return scope
+
+
+def scoped_select(model, current_user, *columns):
+    """
+    ``select(model)`` limited to the rows ``current_user`` may access; with
+    ``columns``, selects those from ``model`` instead (for aggregates).
+    """
+    scope, joins = _scope(model, current_user)
+    query = select(*columns).select_from(model) if columns else select(model)
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return query.where(scope)
+
+
+async def get_scoped(
+    db: AsyncSession,
+    model,
+    entity_id: int,
+    current_user,
+    not_found: str,
+    forbidden: str,
+    options: Sequence = (),
+):
+    """
+    Load one row and check it is in ``current_user``'s scope, in a single
+    statement: the scope condition is selected next to the row instead of
+    filtering it out, so a missing row is still a 404 and an out-of-scope
+    one a 403.
+    """
+    scope, joins = _scope(model, current_user)
+    query = select(model, scope.label("in_scope"))
+    for target, onclause in joins:
+        query = query.outerjoin(target, onclause)
+    query = query.where(model.id == entity_id).options(*options)
+
+    row = (await db.execute(query)).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    entity, in_scope = row
+    if not in_scope:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden)
+    return entity
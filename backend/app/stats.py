@@ -0,0 +1,124 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .core.config import settings
+from .scoping import scoped_select
+
+# Days of per-day counts the dashboard shows by default, and at most
+DEFAULT_STATS_DAYS = 30
+MAX_STATS_DAYS = 366
+
+
+async def _counts(db: AsyncSession, model, current_user, column, *criteria) -> Dict[str, int]:
+    """``SELECT column, COUNT(*) ... GROUP BY column`` over the rows ``current_user`` may access."""
+    query = scoped_select(model, current_user, column, func.count()).where(*criteria).group_by(column)
+    return {
+        ("none" if key is None else str(key)): count
+        for key, count in (await db.execute(query)).all()
+    }
+
+
+async def compute_stats(db: AsyncSession, current_user, days: int = DEFAULT_STATS_DAYS) -> dict:
+    """
+    Dashboard counts for requests, cases and users, scoped like the list
+    endpoints: superadmins count everything, admins their barangay, users
+    their own rows. Each breakdown is one GROUP BY query; per-day counts
+    cover the last ``days`` days (UTC).
+    """
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    request_day = func.date(models.Request.created_at)
+    case_day = func.date(models.Case.created_at)
+
+    requests_by_status = await _counts(db, models.Request, current_user, models.Request.status)
+    cases_total = (await db.execute(scoped_select(models.Case, current_user, func.count()))).scalar_one()
+    users_by_role = await _counts(db, models.User, current_user, models.User.role)
+    return {
+        "days": days,
+        "requests": {
+            "total": sum(requests_by_status.values()),
+            "by_status": requests_by_status,
+            "by_document_type": await _counts(db, models.Request, current_user, models.Request.document_type),
+            "by_barangay": await _counts(db, models.Request, current_user, models.Request.barangay_id),
+            "by_day": await _counts(
+                db, models.Request, current_user, request_day, models.Request.created_at >= since,
+            ),
+        },
+        "cases": {
+            "total": cases_total,
+            "by_day": await _counts(db, models.Case, current_user, case_day, models.Case.created_at >= since),
+        },
+        "users": {
+            "total": sum(users_by_role.values()),
+            "by_role": users_by_role,
+            "by_barangay": await _counts(db, models.User, current_user, models.User.barangay_id),
+        },
+    }
+
+
+def stats_scope_key(current_user) -> Tuple[str, Optional[int]]:
+    """Callers with the same key see the same counts."""
+    if current_user.role == "superadmin":
+        return ("superadmin", None)
+    if current_user.role == "admin":
+        return ("admin", current_user.barangay_id)
+    return ("user", current_user.id)
+
+
+class StatsCache:
+    """
+    Per-worker cache of /stats/ results, keyed on scope and day range.
+
+    Entries expire after ``ttl`` seconds. Writes to requests, cases or users
+    in this worker call ``invalidate``, which drops every entry (one write
+    can move counts in several scopes); other workers' writes show up once
+    their entries expire.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[tuple, Tuple[float, dict]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, current_user, days: int = DEFAULT_STATS_DAYS) -> dict:
+        key = (stats_scope_key(current_user), days)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self._generation
+        stats = await compute_stats(db, current_user, days)
+        # A write during the queries may not be counted; keep the result
+        # for this caller but do not cache it
+        if generation == self._generation and self.ttl > 0:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[key] = (now + self.ttl, stats)
+        return stats
+
+    def invalidate(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+stats_cache = StatsCache(settings.stats_cache_ttl)
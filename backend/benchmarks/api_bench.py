@@ -0,0 +1,198 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app import models
+from app.core.config import settings
+from app.db import Base, engine
+from app.main import ALEMBIC_INI, app
+from app.pagination import NEXT_CURSOR_HEADER
+from app.passwords import hash_password
+from app.stats import stats_cache
+
+from timing import measure
+
+BENCHMARK_PASSWORD = "benchmark"
+DOCUMENT_TYPES = ("barangay_clearance", "certificate_of_residency", "certificate_of_indigency", "business_permit")
+REQUEST_STATUSES = ("pending", "approved", "rejected", "released")
+INSERT_CHUNK = 1000
+
+# Fixed accounts the endpoints are called as
+ROLE_ACCOUNTS = {
+    "superadmin": 1,
+    "admin": 2,
+    "user": 3,
+}
+
+
+def _insert(connection, model, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_CHUNK):
+        connection.execute(insert(model), rows[start:start + INSERT_CHUNK])
+
+
+def seed_database(rows: int, seed: int = 1234) -> dict:
+    """
+    Fill the (empty) benchmark database: ``rows`` requests, cases and chats,
+    a tenth as many users spread over barangays of about 500 users' worth
+    of rows each, timestamps spread over the past year. Deterministic for a
+    given size and seed.
+    """
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+
+    def created_at() -> datetime:
+        return now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+    barangay_count = max(1, rows // 500)
+    user_count = max(10, rows // 10)
+    hashed = hash_password(BENCHMARK_PASSWORD, settings.password_hash_rounds)
+    users = []
+    for user_id in range(1, user_count + 1):
+        role = {1: "superadmin", 2: "admin"}.get(user_id, "user")
+        users.append({
+            "id": user_id,
+            "email": f"bench{user_id}@example.com",
+            "username": f"bench{user_id}",
+            "hashed_password": hashed,
+            "first_name": "Bench",
+            "last_name": str(user_id),
+            "role": role,
+            "barangay_id": None if role == "superadmin" else (1 if user_id <= 3 else rng.randint(1, barangay_count)),
+            "is_active": True,
+            "token_version": 0,
+            "created_at": created_at(),
+        })
+    barangay_of = {user["id"]: user["barangay_id"] for user in users}
+    residents = list(range(3, user_count + 1))
+
+    requests = []
+    for _ in range(rows):
+        requester_id = rng.choice(residents)
+        requests.append({
+            "requester_id": requester_id,
+            "barangay_id": barangay_of[requester_id],
+            "document_type": rng.choice(DOCUMENT_TYPES),
+            "purpose": "Benchmark request",
+            "status": rng.choice(REQUEST_STATUSES),
+            "created_at": created_at(),
+        })
+    cases = [
+        {"title": "Benchmark case", "description": "Benchmark case", "reporter_id": rng.choice(residents), "created_at": created_at()}
+        for _ in range(rows)
+    ]
+    chats = []
+    for _ in range(rows):
+        # A share of the traffic is between the benchmark user and admin
+        if rng.random() < 0.1:
+            sender_id, receiver_id = rng.choice(((2, 3), (3, 2)))
+        else:
+            sender_id, receiver_id = rng.sample(range(1, user_count + 1), 2)
+        chats.append({"sender_id": sender_id, "receiver_id": receiver_id,
+                      "user_low_id": min(sender_id, receiver_id), "user_high_id": max(sender_id, receiver_id),
+                      "message": "Benchmark message", "is_bot": False, "created_at": created_at()})
+    chats.sort(key=lambda chat: chat["created_at"])
+
+    # Conversation summaries as POST /chats/ would have left them
+    conversations: Dict[tuple, dict] = {}
+    for chat_id, chat in enumerate(chats, start=1):
+        for user_id, peer_id, incoming in ((chat["sender_id"], chat["receiver_id"], 0),
+                                           (chat["receiver_id"], chat["sender_id"], 1)):
+            summary = conversations.setdefault((user_id, peer_id), {
+                "user_id": user_id, "peer_id": peer_id, "unread_count": 0,
+            })
+            summary["last_chat_id"] = chat_id
+            summary["last_at"] = chat["created_at"]
+            summary["unread_count"] += incoming
+
+    with engine.begin() as connection:
+        _insert(connection, models.Barangay, [{"id": i, "name": f"Barangay {i}"} for i in range(1, barangay_count + 1)])
+        _insert(connection, models.User, users)
+        _insert(connection, models.Request, requests)
+        _insert(connection, models.Case, cases)
+        _insert(connection, models.Chat, chats)
+        _insert(connection, models.Conversation, list(conversations.values()))
+        # Built from the models, so already at the latest migration
+        scripts = ScriptDirectory.from_config(AlembicConfig(ALEMBIC_INI))
+        MigrationContext.configure(connection).stamp(scripts, scripts.get_current_head())
+
+    return {
+        "rows": rows,
+        "users": user_count,
+        "barangays": barangay_count,
+        "conversations": len(conversations),
+        "request_ids": [rng.randint(1, rows) for _ in range(200)],
+        "case_ids": [rng.randint(1, rows) for _ in range(200)],
+        "user_ids": [rng.randint(1, user_count) for _ in range(200)],
+    }
+
+
+def _get(client: TestClient, headers: dict):
+    def get(path: str):
+        response = client.get(path, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}: {response.text[:200]}")
+        return response
+    return get
+
+
+def _deep_cursor(get, path: str, pages: int = 10) -> str:
+    """Cursor of page ``pages`` of a list endpoint, for timing a deep page."""
+    cursor = None
+    for _ in range(pages - 1):
+        response = get(path + (f"&cursor={cursor}" if cursor else ""))
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    return cursor
+
+
+def run_api_benchmarks(seeded: dict, requests_per_endpoint: int = 200) -> dict:
+    """
+    Sequential latency of the list and detail endpoints for each role, over
+    the in-process ASGI app (TestClient), against the seeded database.
+    Detail endpoints cycle through fixed ids; some are out of the caller's
+    scope for admins and users, so those are only timed for the superadmin.
+    """
+    results = {}
+    with TestClient(app) as client:
+        tokens = {}
+        for role, user_id in ROLE_ACCOUNTS.items():
+            response = client.post("/auth/login", data={"username": f"bench{user_id}@example.com", "password": BENCHMARK_PASSWORD})
+            response.raise_for_status()
+            tokens[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        def run(name: str, get, paths: List[str], **options):
+            # Warm up caches and the connection pool first
+            for path in paths[:5]:
+                get(path)
+            repeated = (paths * (requests_per_endpoint // len(paths) + 1))[:requests_per_endpoint]
+            results[name] = measure(get, repeated, **options)
+
+        for role, headers in tokens.items():
+            get = _get(client, headers)
+            for resource in ("requests", "cases", "users"):
+                path = f"/{resource}/?limit=100"
+                run(f"api.{role}.{resource}.list", get, [path])
+                cursor = _deep_cursor(get, path)
+                if cursor:
+                    run(f"api.{role}.{resource}.list_page10", get, [f"{path}&cursor={cursor}"])
+            run(f"api.{role}.requests.list_status", get, ["/requests/?limit=100&status=pending"])
+            run(f"api.{role}.chats.list", get, ["/chats/?limit=100"])
+            run(f"api.{role}.conversations.list", get, ["/chats/conversations?limit=50"])
+            run(f"api.{role}.stats.cached", get, ["/stats/"])
+            run(f"api.{role}.stats.uncached", get, ["/stats/"], before_each=stats_cache.invalidate)
+
+        get = _get(client, tokens["superadmin"])
+        run("api.superadmin.requests.detail", get, [f"/requests/{i}" for i in seeded["request_ids"]])
+        run("api.superadmin.cases.detail", get, [f"/cases/{i}" for i in seeded["case_ids"]])
+        run("api.superadmin.users.detail", get, [f"/users/{i}" for i in seeded["user_ids"]])
+        run("api.user.conversation", _get(client, tokens["user"]), ["/chats/conversations/2?limit=100"])
+        run("api.admin.conversation", _get(client, tokens["admin"]), ["/chats/conversations/3?limit=100"])
+    return results
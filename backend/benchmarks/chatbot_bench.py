@@ -0,0 +1,24 @@
+from typing import Dict, List
+
+from app.chatbot import answer_cache, find_best_match, generate_chat_response
+
+from timing import measure
+
+
+def run_chatbot_benchmarks(corpus: Dict[str, List[str]], rounds: int = 3) -> dict:
+    """
+    Latency of find_best_match and generate_chat_response per query kind.
+    generate_chat_response is measured with the answer cache cleared before
+    every call (matcher cost) and again with every answer cached.
+    """
+    results = {}
+    for kind, queries in corpus.items():
+        results[f"chatbot.find_best_match.{kind}"] = measure(find_best_match, queries, rounds)
+        results[f"chatbot.generate_chat_response.{kind}.uncached"] = measure(
+            generate_chat_response, queries, rounds, before_each=answer_cache.clear,
+        )
+        for query in queries:
+            generate_chat_response(query)
+        results[f"chatbot.generate_chat_response.{kind}.cached"] = measure(generate_chat_response, queries, rounds)
+    answer_cache.clear()
+    return results
@@ -0,0 +1,67 @@
+"""
+Script to compare two benchmark result files from run_benchmarks.py
+Run this with: python benchmarks/compare_benchmarks.py baseline.json current.json [--metric p95_ms] [--threshold 0.15]
+
+Prints the change of every benchmark present in both files and exits
+non-zero when any got slower by more than the threshold, so it can gate a
+CI job. Changes smaller than --min-ms are ignored as noise on very fast
+benchmarks.
+"""
+import argparse
+import json
+import sys
+
+# Meta fields that must match for the numbers to be comparable
+COMPARABLE_META = ("corpus", "faq_version", "chatbot_backend", "answer_cache_backend", "rows", "seed")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--metric", default="p50_ms", help="Latency field to compare (p50_ms, p95_ms, p99_ms, mean_ms)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="Ignore absolute changes below this many ms")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+
+    for field in COMPARABLE_META:
+        before, after = baseline["meta"].get(field), current["meta"].get(field)
+        if before != after:
+            print(f"Warning: {field} differs ({before} vs {after}); results may not be comparable")
+
+    regressions = []
+    print(f"{'benchmark':<55} {'baseline':>10} {'current':>10} {'change':>9}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<55} {'-':>10} {result[args.metric]:>10.3f}       new")
+            continue
+        before = baseline["results"][name][args.metric]
+        after = result[args.metric]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if after - before >= args.min_ms and change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif before - after >= args.min_ms and -change > args.threshold:
+            flag = "  faster"
+        print(f"{name:<55} {before:>10.3f} {after:>10.3f} {change:>+8.1%}{flag}")
+    for name in baseline["results"]:
+        if name not in current["results"]:
+            print(f"{name:<55} {'':>10} {'-':>10}   missing")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%} on {args.metric}")
+        sys.exit(1)
+    print(f"No regressions on {args.metric}")
+
+
+if __name__ == "__main__":
+    main()
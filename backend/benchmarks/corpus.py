@@ -0,0 +1,68 @@
+import hashlib
+import json
+import random
+import string
+from typing import Dict, List
+
+# Off-topic questions the FAQ should not answer
+MISS_QUESTIONS = [
+    "What is the weather forecast for tomorrow?",
+    "How do I reset my router password?",
+    "Recommend a good pizza place nearby",
+    "Who won the basketball game last night?",
+    "How many calories are in a banana?",
+    "Translate good morning into Japanese",
+    "What is the capital of Australia?",
+    "How do I bake sourdough bread at home?",
+    "Best smartphone to buy this year",
+    "Explain the theory of relativity simply",
+    "How fast can a cheetah run?",
+    "What time does the movie start tonight?",
+]
+
+
+def add_typos(text: str, rng: random.Random, rate: float = 0.3) -> str:
+    """Swap, drop or double a letter in about ``rate`` of the longer words."""
+    words = text.split()
+    for position, word in enumerate(words):
+        if len(word) <= 3 or rng.random() >= rate:
+            continue
+        i = rng.randrange(len(word) - 1)
+        kind = rng.choice(("swap", "drop", "double"))
+        if kind == "swap":
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        elif kind == "drop":
+            word = word[:i] + word[i + 1:]
+        else:
+            word = word[:i] + word[i] + word[i:]
+        words[position] = word
+    return " ".join(words)
+
+
+def gibberish(rng: random.Random, words: int = 6) -> str:
+    return " ".join(
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+        for _ in range(words)
+    )
+
+
+def build_corpus(questions: List[str], size: int = 300, seed: int = 1234) -> Dict[str, List[str]]:
+    """
+    Fixed query sets drawn from the FAQ questions: exact hits, the same
+    questions with typos, and misses (off-topic and gibberish). The same
+    FAQ, size and seed always give the same corpus.
+    """
+    rng = random.Random(seed)
+    per_kind = max(1, size // 3)
+    hits = [rng.choice(questions) for _ in range(per_kind)]
+    typos = [add_typos(rng.choice(questions), rng) for _ in range(per_kind)]
+    misses = [
+        MISS_QUESTIONS[i % len(MISS_QUESTIONS)] if i % 2 == 0 else gibberish(rng)
+        for i in range(per_kind)
+    ]
+    return {"hit": hits, "typo": typos, "miss": misses}
+
+
+def corpus_digest(corpus: Dict[str, List[str]]) -> str:
+    """Short hash of the corpus, so results from different corpora are not compared blindly."""
+    return hashlib.sha1(json.dumps(corpus, sort_keys=True).encode("utf-8")).hexdigest()[:12]
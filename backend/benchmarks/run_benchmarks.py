@@ -0,0 +1,116 @@
+"""
+Script to benchmark the chatbot matcher and the REST list/detail endpoints
+Run this with: python benchmarks/run_benchmarks.py [--suite all|chatbot|api] [--output results.json]
+
+The chatbot suite times find_best_match and generate_chat_response over a
+fixed query corpus built from the FAQ (exact hits, hits with typos, and
+misses). The API suite seeds a throwaway SQLite database with a fixed
+random data set and times the list, deep-page and detail endpoints for
+each role through the in-process app. Results are written as JSON; compare
+two runs with benchmarks/compare_benchmarks.py.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import platform
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+# The app reads its settings on import: point it at a throwaway database
+benchmark_dir = tempfile.mkdtemp(prefix="bla-benchmark-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(benchmark_dir, 'benchmark.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+import fastapi
+import sqlalchemy
+
+from app.chatbot import get_snapshot
+from app.core.config import settings
+
+from corpus import build_corpus, corpus_digest
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def print_table(results: dict):
+    print(f"{'benchmark':<55} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for name, result in results.items():
+        print(f"{name:<55} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f} {result['ops_per_sec']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot matcher and the REST hot paths")
+    parser.add_argument("--suite", choices=("all", "chatbot", "api"), default="all")
+    parser.add_argument("--queries", type=int, default=300, help="Chatbot queries in the corpus (split over hit/typo/miss)")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the chatbot corpus")
+    parser.add_argument("--rows", type=int, default=10000, help="Requests, cases and chats to seed")
+    parser.add_argument("--requests", type=int, default=200, help="Timed calls per endpoint")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="JSON results file (default: benchmark-<commit>.json)")
+    args = parser.parse_args()
+
+    # Keep per-request logging out of the timings
+    logging.disable(logging.INFO)
+
+    commit = git_commit()
+    snapshot = get_snapshot()
+    corpus = build_corpus(snapshot.index.questions, args.queries, args.seed)
+    meta = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fastapi": fastapi.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "suite": args.suite,
+        "seed": args.seed,
+        "chatbot_backend": settings.chatbot_backend,
+        "answer_cache_backend": settings.answer_cache_backend,
+        "faq_version": snapshot.version,
+        "corpus": corpus_digest(corpus),
+        "queries": sum(len(queries) for queries in corpus.values()),
+        "rounds": args.rounds,
+        "rows": args.rows,
+        "requests_per_endpoint": args.requests,
+    }
+
+    results = {}
+    try:
+        if args.suite in ("all", "chatbot"):
+            from chatbot_bench import run_chatbot_benchmarks
+            print("Running chatbot benchmarks...")
+            results.update(run_chatbot_benchmarks(corpus, args.rounds))
+        if args.suite in ("all", "api"):
+            from api_bench import run_api_benchmarks, seed_database
+            print(f"Seeding {args.rows} rows...")
+            seeded = seed_database(args.rows, args.seed)
+            meta["users"] = seeded["users"]
+            meta["barangays"] = seeded["barangays"]
+            print("Running API benchmarks...")
+            results.update(run_api_benchmarks(seeded, args.requests))
+    finally:
+        shutil.rmtree(benchmark_dir, ignore_errors=True)
+
+    print_table(results)
+    output = args.output or f"benchmark-{commit}.json"
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
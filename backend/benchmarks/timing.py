@@ -0,0 +1,44 @@
+import math
+import time
+from typing import Callable, List, Optional
+
+
+def summarize(samples: List[float], total_seconds: Optional[float] = None) -> dict:
+    """Latency percentiles (ms) and throughput of per-call timings in seconds."""
+    ordered = sorted(samples)
+    count = len(ordered)
+    if not count:
+        return {"count": 0}
+    total = total_seconds if total_seconds is not None else sum(ordered)
+
+    def percentile(p: float) -> float:
+        # Nearest rank, so the value is one that was actually measured
+        return ordered[max(0, math.ceil(p / 100 * count) - 1)] * 1000
+
+    return {
+        "count": count,
+        "mean_ms": round(sum(ordered) / count * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "p50_ms": round(percentile(50), 4),
+        "p95_ms": round(percentile(95), 4),
+        "p99_ms": round(percentile(99), 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(count / total, 2) if total > 0 else None,
+    }
+
+
+def measure(function: Callable, arguments: list, rounds: int = 1, before_each: Optional[Callable] = None) -> dict:
+    """
+    Call ``function(argument)`` for every argument, ``rounds`` times over,
+    timing each call on its own. ``before_each`` runs untimed before every
+    call (e.g. to clear a cache).
+    """
+    samples = []
+    for _ in range(rounds):
+        for argument in arguments:
+            if before_each is not None:
+                before_each()
+            started_at = time.perf_counter()
+            function(argument)
+            samples.append(time.perf_counter() - started_at)
+    return summarize(samples)
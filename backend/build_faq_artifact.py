@@ -0,0 +1,26 @@
+"""
+Compile the FAQ JSON into the binary artifact the chatbot memory-maps at startup
+Run this with: python build_faq_artifact.py [source.json] [output.faq]
+
+Accepts barangay_law_flutter.json or barangay_law_categorized.json. The
+artifact records the SHA-1 of its source, so the API falls back to the JSON
+whenever the JSON has changed since the last build.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.faq_artifact import compile_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(BASE_DIR, "barangay_law_flutter.json")
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCE
+    output = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".faq"
+    summary = compile_artifact(source, output)
+    print(f"Compiled {summary['questions']} questions in {summary['categories']} categories "
+          f"({summary['tokens']} tokens) into {summary['output']} ({summary['bytes']} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Script to check that the list endpoints' queries use the composite indexes
+from migrations/versions/0002_role_scoped_indexes.py and 0004_chat_conversations.py
+Run this with: python check_query_plans.py
+
+Runs EXPLAIN (MySQL/MariaDB) or EXPLAIN QUERY PLAN (SQLite) on each role's
+list query, exactly as app.scoping and app.pagination build it, and exits
+non-zero when a query does not use its index or needs a sort. Run it
+against a database with some data in it; optimizers may ignore indexes on
+empty tables.
+
+This is a manual tool: the repo has no CI, so nothing runs it
+automatically. Run it by hand after changing a migration, an index, or a
+list query in app.scoping or app.pagination, alongside `alembic check`.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import or_, select, text
+
+from app.db import engine
+from app.models import Case, Chat, Conversation, Request, User
+from app.pagination import DEFAULT_PAGE_LIMIT, PageParams, page_query
+from app.scoping import scoped_select
+
+SUPERADMIN = SimpleNamespace(id=1, role="superadmin", barangay_id=None)
+ADMIN = SimpleNamespace(id=1, role="admin", barangay_id=1)
+USER = SimpleNamespace(id=1, role="user", barangay_id=1)
+
+
+def first_page():
+    return PageParams(cursor=None, limit=DEFAULT_PAGE_LIMIT, created_from=None, created_to=None)
+
+
+def later_page():
+    page = first_page()
+    page.cursor = (datetime(2030, 1, 1), 1_000_000)
+    return page
+
+
+# (description, model, base query, expected index names, whether a sort is acceptable)
+CHECKS = [
+    ("requests: superadmin", Request, scoped_select(Request, SUPERADMIN), ["ix_requests_created"], False),
+    ("requests: admin", Request, scoped_select(Request, ADMIN), ["ix_requests_barangay_created"], False),
+    ("requests: admin, status filter", Request,
+     scoped_select(Request, ADMIN).where(Request.status == "pending"),
+     ["ix_requests_barangay_status_created"], False),
+    ("requests: user", Request, scoped_select(Request, USER), ["ix_requests_requester_created"], False),
+    ("cases: superadmin", Case, scoped_select(Case, SUPERADMIN), ["ix_cases_created"], False),
+    ("cases: user", Case, scoped_select(Case, USER), ["ix_cases_reporter_created"], False),
+    ("users: superadmin", User, scoped_select(User, SUPERADMIN), ["ix_users_created"], False),
+    ("users: admin", User, scoped_select(User, ADMIN), ["ix_users_barangay_created"], False),
+    # Either side of the conversation: two index range scans merged, then sorted
+    ("chats: user", Chat, select(Chat).where(or_(Chat.sender_id == 1, Chat.receiver_id == 1), Chat.is_bot.is_(False)),
+     ["ix_chats_sender_created", "ix_chats_receiver_created"], True),
+    ("chats: conversation", Chat,
+     select(Chat).where(Chat.user_low_id == 1, Chat.user_high_id == 2, Chat.is_bot.is_(False)),
+     ["ix_chats_pair_created"], False),
+    ("conversations: user", Conversation, select(Conversation).where(Conversation.user_id == 1),
+     ["ix_conversations_user_last"], False),
+]
+
+# Sort keys of models not paged on (created_at, id)
+PAGE_KEYS = {
+    Conversation: (Conversation.last_at, Conversation.peer_id),
+}
+
+
+def explain(connection, statement) -> list:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        return [row.detail for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    return [
+        f"table={row.table} type={row.type} key={row.key} extra={row.Extra}"
+        for row in connection.execute(text("EXPLAIN " + sql))
+    ]
+
+
+def uses_sort(plan: list) -> bool:
+    return any("TEMP B-TREE FOR ORDER BY" in line or "Using filesort" in line for line in plan)
+
+
+def check_query_plans() -> bool:
+    failures = 0
+    with engine.connect() as connection:
+        print(f"\n🔍 Query plans on {connection.dialect.name}\n")
+        for description, model, query, indexes, sort_ok in CHECKS:
+            for page_name, page in (("first page", first_page()), ("later page", later_page())):
+                plan = explain(connection, page_query(query, model, page, PAGE_KEYS.get(model)))
+                missing = [index for index in indexes if not any(index in line for line in plan)]
+                sorted_ = uses_sort(plan)
+                ok = not missing and (sort_ok or not sorted_)
+                failures += not ok
+                print(f"{'✅' if ok else '❌'} {description} ({page_name})")
+                if not ok:
+                    if missing:
+                        print(f"   missing index: {', '.join(missing)}")
+                    if sorted_ and not sort_ok:
+                        print("   sorts rows instead of reading them in index order")
+                    for line in plan:
+                        print(f"   {line}")
+
+    if failures:
+        print(f"\n❌ {failures} quer{'y' if failures == 1 else 'ies'} not using their index")
+        print("💡 Run 'alembic upgrade head' and make sure the tables have data.")
+        return False
+    print("\n✅ All list queries use their indexes")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
@@ -0,0 +1,58 @@
+"""
+Script to bulk-import users (and their barangays) from a CSV or JSON Lines file
+Run this with: python import_users.py residents.csv [--dry-run] [--create-barangays]
+
+CSV files need a header row. Columns/keys are those of POST /users/
+(email, username, password, first_name, last_name, phone, address, role,
+barangay_id) plus an optional "barangay" name. Prints one JSON result per
+row, then a summary.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from app.bulk_import import IMPORT_CHUNK_SIZE, UserImport, chunked, detect_format, read_rows
+from app.core.config import settings
+from app.db import SessionLocal
+
+
+def import_users(path, fmt=None, dry_run=False, create_barangays=False, barangay_id=None,
+                 chunk_size=IMPORT_CHUNK_SIZE, failures_only=False, out=sys.stdout):
+    job = UserImport(barangay_id=barangay_id, create_barangays=create_barangays, dry_run=dry_run)
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f, \
+                ThreadPoolExecutor(settings.import_hash_workers, thread_name_prefix="import-bcrypt") as executor:
+            for chunk in chunked(read_rows(f, detect_format(path, fmt)), chunk_size):
+                job.validate(chunk)
+                job.check(db, chunk)
+                job.hash_passwords(chunk, executor, settings.password_hash_rounds)
+                job.insert(db, chunk)
+                for result in job.tally(chunk):
+                    if not failures_only or result["status"] not in ("created", "would_create"):
+                        out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        db.close()
+    return job.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import users from CSV or JSON Lines")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults from the file extension, else csv")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check only; write nothing")
+    parser.add_argument("--create-barangays", action="store_true", help="create barangays named in the file that do not exist")
+    parser.add_argument("--barangay-id", type=int, help="put every imported user in this barangay")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--failures-only", action="store_true", help="only print rows that were not imported")
+    args = parser.parse_args()
+
+    summary = import_users(args.path, args.format, args.dry_run, args.create_barangays,
+                           args.barangay_id, args.chunk_size, args.failures_only)
+    print(json.dumps(summary), file=sys.stderr)
+    sys.exit(0 if set(summary["summary"]) <= {"created", "would_create"} else 1)
@@ -0,0 +1,112 @@
+"""Initial schema, as previously created by Base.metadata.create_all
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Databases that were set up by create_all at startup already have these
+tables; they are left alone, so ``alembic upgrade head`` adopts them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_initial_schema'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'barangays' not in existing:
+        op.create_table(
+            'barangays',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=255), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'),
+        )
+        op.create_index('ix_barangays_id', 'barangays', ['id'])
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=255), nullable=False),
+            sa.Column('username', sa.String(length=50), nullable=False),
+            sa.Column('hashed_password', sa.String(length=255), nullable=False),
+            sa.Column('first_name', sa.String(length=50), nullable=False),
+            sa.Column('last_name', sa.String(length=50), nullable=False),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('address', sa.Text(), nullable=True),
+            sa.Column('role', sa.String(length=20), nullable=True),
+            sa.Column('barangay_id', sa.Integer(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['barangay_id'], ['barangays.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    if 'cases' not in existing:
+        op.create_table(
+            'cases',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=255), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('reporter_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['reporter_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_cases_id', 'cases', ['id'])
+
+    if 'chats' not in existing:
+        op.create_table(
+            'chats',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('sender_id', sa.Integer(), nullable=False),
+            sa.Column('receiver_id', sa.Integer(), nullable=False),
+            sa.Column('message', sa.Text(), nullable=False),
+            sa.Column('is_bot', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['receiver_id'], ['users.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_chats_id', 'chats', ['id'])
+
+    if 'requests' not in existing:
+        op.create_table(
+            'requests',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('requester_id', sa.Integer(), nullable=False),
+            sa.Column('barangay_id', sa.Integer(), nullable=False),
+            sa.Column('document_type', sa.String(length=100), nullable=False),
+            sa.Column('purpose', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['barangay_id'], ['barangays.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['requester_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_requests_id', 'requests', ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('requests')
+    op.drop_table('chats')
+    op.drop_table('cases')
+    op.drop_table('users')
+    op.drop_table('barangays')
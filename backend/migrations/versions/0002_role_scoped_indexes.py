@@ -0,0 +1,64 @@
+"""Composite indexes for the role-scoped, keyset-paginated list queries
+
+Revision ID: 0002_role_scoped_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 00:00:01
+
+Each index leads with the column a role scope or filter pins (barangay,
+requester, reporter, sender/receiver) and ends with created_at, so a page
+ordered by (created_at, id) is read straight off the index without a sort.
+Verify with ``python check_query_plans.py``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_role_scoped_indexes'
+down_revision: Union[str, Sequence[str], None] = '0001_initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_users_barangay_created', 'users', ['barangay_id', 'created_at']),
+    ('ix_users_created', 'users', ['created_at']),
+    ('ix_cases_reporter_created', 'cases', ['reporter_id', 'created_at']),
+    ('ix_cases_created', 'cases', ['created_at']),
+    ('ix_chats_sender_created', 'chats', ['sender_id', 'created_at']),
+    ('ix_chats_receiver_created', 'chats', ['receiver_id', 'created_at']),
+    ('ix_chats_created', 'chats', ['created_at']),
+    ('ix_requests_barangay_created', 'requests', ['barangay_id', 'created_at']),
+    ('ix_requests_barangay_status_created', 'requests', ['barangay_id', 'status', 'created_at']),
+    ('ix_requests_requester_created', 'requests', ['requester_id', 'created_at']),
+    ('ix_requests_created', 'requests', ['created_at']),
+)
+
+FOREIGN_KEY_COLUMNS = (
+    ('users', 'barangay_id'),
+    ('cases', 'reporter_id'),
+    ('chats', 'sender_id'),
+    ('chats', 'receiver_id'),
+    ('requests', 'barangay_id'),
+    ('requests', 'requester_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        # Databases built by create_all from the current models already have them
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # MySQL needs an index on every foreign key column and drops its own once
+    # a composite index covers the column, so put plain ones back first
+    for table, column in FOREIGN_KEY_COLUMNS:
+        op.create_index(f'ix_{table}_{column}', table, [column])
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
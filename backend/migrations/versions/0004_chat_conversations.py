@@ -0,0 +1,74 @@
+"""Participant pair on chats and per-user conversation summaries
+
+Revision ID: 0004_chat_conversations
+Revises: 0003_user_token_version
+Create Date: 2026-10-18 00:00:03
+
+chats.user_low_id/user_high_id hold the two participants in a fixed order,
+so ix_chats_pair_created serves a conversation in either direction as one
+index range. conversations holds each user's last message and unread count
+per peer; existing conversations start with nothing unread.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_chat_conversations'
+down_revision: Union[str, Sequence[str], None] = '0003_user_token_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # Databases built by create_all from the current models already have these
+    if 'user_low_id' not in {column['name'] for column in inspector.get_columns('chats')}:
+        op.add_column('chats', sa.Column('user_low_id', sa.Integer(), nullable=True))
+        op.add_column('chats', sa.Column('user_high_id', sa.Integer(), nullable=True))
+        op.execute(
+            "UPDATE chats SET"
+            " user_low_id = CASE WHEN sender_id < receiver_id THEN sender_id ELSE receiver_id END,"
+            " user_high_id = CASE WHEN sender_id < receiver_id THEN receiver_id ELSE sender_id END"
+        )
+        with op.batch_alter_table('chats') as batch_op:
+            batch_op.alter_column('user_low_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.alter_column('user_high_id', existing_type=sa.Integer(), nullable=False)
+    if 'ix_chats_pair_created' not in {index['name'] for index in inspector.get_indexes('chats')}:
+        op.create_index('ix_chats_pair_created', 'chats', ['user_low_id', 'user_high_id', 'created_at'])
+
+    if not inspector.has_table('conversations'):
+        op.create_table(
+            'conversations',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('peer_id', sa.Integer(), nullable=False),
+            sa.Column('last_chat_id', sa.Integer(), nullable=True),
+            sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['peer_id'], ['users.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['last_chat_id'], ['chats.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('user_id', 'peer_id'),
+        )
+        op.create_index('ix_conversations_user_last', 'conversations', ['user_id', 'last_at'])
+        op.execute(
+            "INSERT INTO conversations (user_id, peer_id, last_chat_id, last_at, unread_count)"
+            " SELECT user_id, peer_id, MAX(id), COALESCE(MAX(created_at), CURRENT_TIMESTAMP), 0 FROM ("
+            "  SELECT sender_id AS user_id, receiver_id AS peer_id, id, created_at FROM chats"
+            "  UNION ALL"
+            "  SELECT receiver_id, sender_id, id, created_at FROM chats"
+            " ) AS participants GROUP BY user_id, peer_id"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversations_user_last', table_name='conversations')
+    op.drop_table('conversations')
+    op.drop_index('ix_chats_pair_created', table_name='chats')
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.drop_column('user_high_id')
+        batch_op.drop_column('user_low_id')
@@ -0,0 +1,46 @@
+"""Chatbot side of saved chatbot exchanges as NULL sender/receiver
+
+Revision ID: 0005_chatbot_exchanges
+Revises: 0004_chat_conversations
+Create Date: 2026-10-18 00:00:04
+
+Chatbot exchanges are saved as is_bot chats between the user and NULL
+(the chatbot), so a reply no longer appears to come from a real user.
+Existing is_bot rows keep their senders; the chat endpoints leave every
+is_bot row out. Downgrading deletes the exchanges saved since.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_chatbot_exchanges'
+down_revision: Union[str, Sequence[str], None] = '0004_chat_conversations'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+chats = sa.table(
+    'chats',
+    sa.column('sender_id', sa.Integer()),
+    sa.column('receiver_id', sa.Integer()),
+    sa.column('is_bot', sa.Boolean()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.alter_column('sender_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('receiver_id', existing_type=sa.Integer(), nullable=True)
+    # The endpoints filter on is_bot, so it must never be NULL
+    op.execute(chats.update().where(chats.c.is_bot.is_(None)).values(is_bot=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(chats.delete().where(sa.or_(chats.c.sender_id.is_(None), chats.c.receiver_id.is_(None))))
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.alter_column('sender_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('receiver_id', existing_type=sa.Integer(), nullable=False)